@@ -0,0 +1,156 @@
+"""Compact architecture context for generation prompts, pruned to the files being written."""
+
+import json
+import re
+from pathlib import PurePosixPath
+from typing import Any, Dict, Iterable, List
+
+from interfaces import estimate_tokens
+
+# Entries of a directory listed around a file; the rest are counted, not listed
+_MAX_DIRECTORY_ENTRIES = 40
+_WORD = re.compile(r"[a-z0-9]+")
+# Path words too common to tie a file to an architecture module
+_GENERIC_WORDS = {
+    "src", "app", "apps", "lib", "libs", "pkg", "packages", "source", "main", "index", "init", "mod",
+    "py", "js", "jsx", "ts", "tsx", "mjs", "cjs", "go", "rs", "rb", "java", "kt", "swift", "json",
+    "yaml", "yml", "toml", "md", "txt", "css", "html", "the", "and", "for",
+}
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces after separators."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def shared_architecture(architecture: Dict) -> Dict:
+    """
+    The part of the architecture every file prompt shares: tech stack, layers and data flow.
+
+    The stack's justification, the module list and the project structure are
+    left out; each file gets its relevant modules and its corner of the
+    structure from file_architecture_context instead.
+    """
+    tech_stack = {key: value for key, value in (architecture.get("tech_stack") or {}).items() if key != "justification"}
+    overview = {key: value for key, value in (architecture.get("architecture") or {}).items() if key != "modules"}
+    return {"tech_stack": tech_stack, "architecture": overview}
+
+
+# Stands in for a file's content in the project structure of the plan and README prompts
+WRITTEN = "(written)"
+
+
+def _outline(structure: Dict) -> Dict:
+    return {
+        name: _outline(content) if isinstance(content, dict)
+        else WRITTEN if isinstance(content, str) and content.strip() else None
+        for name, content in structure.items()
+    }
+
+
+def architecture_outline(architecture: Dict) -> Dict:
+    """
+    The architecture with the file contents of its project structure left out.
+
+    A file the structure has content for is marked "(written)" (it is written
+    as it is, see seeding), other files are null.
+    """
+    structure = architecture.get("project_structure")
+    if not isinstance(structure, dict):
+        return architecture
+    return {**architecture, "project_structure": _outline(structure)}
+
+
+def _words(text: str) -> set:
+    # Plurals match singulars ("users/" and a "User service" module)
+    return {word[:-1] if word.endswith("s") and len(word) > 3 else word for word in _WORD.findall(text.lower())}
+
+
+def relevant_modules(architecture: Dict, file_paths: Iterable[str]) -> List[Any]:
+    """Architecture modules that share a distinctive word with the files' directories or names."""
+    path_words = set()
+    for file_path in file_paths:
+        path = PurePosixPath(file_path)
+        for part in (*path.parts[:-1], path.stem):
+            path_words |= {word for word in _words(part) if len(word) > 2 and word not in _GENERIC_WORDS}
+    modules = (architecture.get("architecture") or {}).get("modules") or []
+    return [module for module in modules if path_words & _words(compact_json(module))]
+
+
+def _directory_listing(directory: Dict) -> Dict:
+    """A directory's entries with subdirectories collapsed and file contents dropped"""
+    listing = {}
+    for name, content in list(directory.items())[:_MAX_DIRECTORY_ENTRIES]:
+        if isinstance(content, dict):
+            listing[name] = "..." if content else {}
+        else:
+            listing[name] = None
+    if len(directory) > _MAX_DIRECTORY_ENTRIES:
+        listing["..."] = f"{len(directory) - _MAX_DIRECTORY_ENTRIES} more entries"
+    return listing
+
+
+def _merge(target: Dict, source: Dict) -> None:
+    for name, content in source.items():
+        if isinstance(target.get(name), dict):
+            # Expanded for another file; keep it expanded
+            if isinstance(content, dict):
+                _merge(target[name], content)
+        else:
+            target[name] = content
+
+
+def structure_around(structure: Dict, file_paths: Iterable[str]) -> Dict:
+    """
+    The project structure pruned to the directories holding the given files.
+
+    Each file's directory is listed with its siblings (subdirectories
+    collapsed to "..."), nested under the chain of directories leading to
+    it. File contents in the structure are replaced with null.
+    """
+    # Models often wrap the whole tree in a directory named after the project
+    root_name, root = next(iter(structure.items())) if len(structure) == 1 else (None, None)
+    pruned: Dict = {}
+    for file_path in file_paths:
+        node = structure
+        chain = []
+        if isinstance(root, dict) and root_name.strip("/") != PurePosixPath(file_path).parts[0]:
+            node = root
+            chain.append(root_name)
+        for part in PurePosixPath(file_path).parts[:-1]:
+            entries = {name.strip("/"): name for name in node}
+            child = node.get(entries.get(part, part))
+            if not isinstance(child, dict):
+                break
+            chain.append(entries.get(part, part))
+            node = child
+        subtree = _directory_listing(node)
+        for name in reversed(chain):
+            subtree = {name: subtree}
+        _merge(pruned, subtree)
+    return pruned
+
+
+def file_architecture_context(architecture: Dict, file_paths: List[str]) -> str:
+    """Compact JSON of the modules and project structure relevant to the files being generated."""
+    context = {
+        "modules": relevant_modules(architecture, file_paths),
+        "project_structure": structure_around(architecture.get("project_structure") or {}, file_paths),
+    }
+    return compact_json(context)
+
+
+def context_token_savings(architecture: Dict, file_paths: List[str]) -> Dict[str, int]:
+    """
+    Estimated architecture tokens per file prompt, as indented JSON and as pruned compact JSON.
+
+    Returns:
+        {"before", "shared", "per_file"}: the full indented architecture, the
+        shared compact part, and the average file-specific part
+    """
+    per_file = [estimate_tokens(file_architecture_context(architecture, [path])) for path in file_paths]
+    return {
+        "before": estimate_tokens(json.dumps(architecture, indent=2)),
+        "shared": estimate_tokens(compact_json(shared_architecture(architecture))),
+        "per_file": sum(per_file) // len(per_file) if per_file else 0,
+    }
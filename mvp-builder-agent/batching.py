@@ -0,0 +1,70 @@
+"""Grouping small planned files so several are generated in one LLM call."""
+
+from pathlib import PurePosixPath
+from typing import Dict, List
+
+# Files that are a few lines in any project
+_TRIVIAL_NAMES = {
+    "__init__.py", "py.typed", "requirements.txt", "requirements-dev.txt", "MANIFEST.in",
+    "Procfile", "runtime.txt", "LICENSE", "CODEOWNERS",
+}
+# Short in all but complex phases: config, constants and barrel exports
+_CONFIG_SUFFIXES = {".json", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".txt", ".env", ".example", ".properties"}
+_SMALL_STEMS = {"constants", "consts", "index", "version", "__main__"}
+
+
+def is_small_file(file_info: Dict) -> bool:
+    """Whether a planned file is likely short enough to share a call with others."""
+    path = PurePosixPath(file_info["path"])
+    if path.name in _TRIVIAL_NAMES or path.name.startswith("."):
+        return True
+    if file_info.get("phase_complexity") == "high":
+        return False
+    return path.suffix.lower() in _CONFIG_SUFFIXES or path.stem.lower() in _SMALL_STEMS
+
+
+def group_small_files(graph: Dict[str, Dict], max_files: int) -> List[List[str]]:
+    """
+    Batches of small files from the same phase, in plan order.
+
+    Only files whose dependencies are all outside the graph (already built) are
+    batched, so a batch never waits on, or forms a cycle with, other pending
+    files. Low-complexity phases get batches of up to max_files, others half
+    that. Single leftover files are not batched.
+    """
+    by_phase: Dict[int, List[str]] = {}
+    for path, info in graph.items():
+        if is_small_file(info) and not any(dep in graph for dep in info["dependencies"]):
+            by_phase.setdefault(info["phase_number"], []).append(path)
+
+    batches = []
+    for paths in by_phase.values():
+        complexity = graph[paths[0]].get("phase_complexity")
+        size = max_files if complexity == "low" else max(2, max_files // 2)
+        for start in range(0, len(paths), size):
+            batch = paths[start:start + size]
+            if len(batch) > 1:
+                batches.append(batch)
+    return batches
+
+
+def collapse_batches(graph: Dict[str, Dict], batches: List[List[str]]) -> Dict[str, Dict]:
+    """
+    File graph where each batch is a single node, keyed by its first file.
+
+    The node's file_info has a "batch" list of the member paths; the scheduler
+    treats a dependency on any member as a dependency on the node.
+    """
+    members = {path: batch for batch in batches for path in batch}
+    collapsed = {}
+    for path, info in graph.items():
+        batch = members.get(path)
+        if batch is None:
+            collapsed[path] = info
+        elif path == batch[0]:
+            collapsed[path] = {
+                **info,
+                "batch": batch,
+                "dependencies": list(dict.fromkeys(dep for member in batch for dep in graph[member]["dependencies"])),
+            }
+    return collapsed
@@ -0,0 +1,133 @@
+"""Offline benchmark of build_prototype against a scripted fake model."""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from fake_llm import CallCounter, ScriptedChatModel  # noqa: E402
+from llm_cache import DiskResponseCache  # noqa: E402
+
+
+def _bytes_written(output_path: Path) -> int:
+    return sum(path.stat().st_size for path in output_path.rglob("*") if path.is_file())
+
+
+def run_build(
+    num_files: int,
+    latency: float,
+    max_workers: int,
+    file_lines: int,
+    use_async: bool = False,
+    batch_small_files: bool = False,
+    route_models: bool = False,
+    cache_dir: Optional[str] = None,
+) -> Dict:
+    """
+    Run one full build of a num_files plan with every LLM call served by ScriptedChatModel.
+
+    Returns:
+        Wall time, LLM calls, bytes written and peak traced Python memory
+    """
+    counter = CallCounter()
+
+    def create_fake_llm(provider, model, temperature=0.1, cache=None):
+        return ScriptedChatModel(
+            num_files=num_files, latency=latency, file_lines=file_lines, model_name=model, counter=counter, cache=cache
+        )
+
+    main.create_llm = create_fake_llm
+    # Pooled models from an earlier run would carry its plan size and counter
+    main._llm_pool.clear()
+    if cache_dir is not None:
+        main._response_cache = DiskResponseCache(cache_dir, 1024 ** 3)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        kwargs = dict(
+            output_dir=output_dir,
+            provider="openai",
+            model="gpt-4o",
+            max_workers=max_workers,
+            use_cache=cache_dir is not None,
+            batch_small_files=batch_small_files,
+            route_models=route_models,
+        )
+        tracemalloc.start()
+        start = time.perf_counter()
+        # The build's progress output would dominate the benchmark's own
+        with contextlib.redirect_stdout(io.StringIO()):
+            if use_async:
+                asyncio.run(main.build_prototype_async("Benchmark builder prompt", **kwargs))
+            else:
+                main.build_prototype("Benchmark builder prompt", **kwargs)
+        wall_time = time.perf_counter() - start
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "files": num_files,
+            "wall_time_s": round(wall_time, 3),
+            "llm_calls": counter.count,
+            "bytes_written": _bytes_written(Path(output_dir)),
+            "peak_memory_mb": round(peak_memory / (1024 * 1024), 2),
+        }
+
+
+def _print_table(results: List[Dict]) -> None:
+    print(f"{'run':<12}{'files':>7}{'wall (s)':>11}{'calls':>8}{'bytes written':>16}{'peak mem (MB)':>16}")
+    for result in results:
+        print(
+            f"{result['run']:<12}{result['files']:>7}{result['wall_time_s']:>11.3f}{result['llm_calls']:>8}"
+            f"{result['bytes_written']:>16,}{result['peak_memory_mb']:>16.2f}"
+        )
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark build_prototype offline with a scripted fake model.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Plan sizes in files")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each fake LLM call takes")
+    parser.add_argument("--workers", type=int, default=main.BUILD_MAX_WORKERS, help="Files generated in parallel")
+    parser.add_argument("--file-lines", type=int, default=40, help="Lines of code per generated file")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Benchmark build_prototype_async")
+    parser.add_argument("--batch", action="store_true", help="Batch small files")
+    parser.add_argument("--route-models", action="store_true", help="Route steps to model tiers")
+    parser.add_argument("--cache", action="store_true", help="Run each size cold then warm against a fresh response cache")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for num_files in args.sizes:
+        options = dict(
+            num_files=num_files,
+            latency=args.latency,
+            max_workers=args.workers,
+            file_lines=args.file_lines,
+            use_async=args.use_async,
+            batch_small_files=args.batch,
+            route_models=args.route_models,
+        )
+        if args.cache:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                results.append({"run": "cold cache", **run_build(**options, cache_dir=cache_dir)})
+                results.append({"run": "warm cache", **run_build(**options, cache_dir=cache_dir)})
+        else:
+            results.append({"run": "async" if args.use_async else "sync", **run_build(**options)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+
+
+if __name__ == "__main__":
+    main_cli()
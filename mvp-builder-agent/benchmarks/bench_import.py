@@ -0,0 +1,95 @@
+"""Cold-start import time of the builder, checked against a budget."""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported once an LLM or a schema is actually needed
+LAZY_PREFIXES = ("langchain", "langsmith", "openai", "anthropic", "ollama", "pydantic")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def _import_once(module: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Import module in a fresh interpreter with -X importtime.
+
+    Returns:
+        Cumulative import time of module (ms), its direct imports with their
+        cumulative times (ms), and the lazy-only modules that got imported
+    """
+    code = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PACKAGE_DIR, capture_output=True, text=True, check=True,
+    )
+    total_ms = 0.0
+    children: List[Tuple[str, float]] = []
+    pending: List[Tuple[str, float]] = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative_ms, indent, name = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        # importtime lists a module's imports before the module itself
+        if indent == 1:
+            if name == module:
+                total_ms, children = cumulative_ms, pending
+            pending = []
+        elif indent == 3:
+            pending.append((name, cumulative_ms))
+    modules = json.loads(result.stdout)
+    lazy_loaded = [name for name in modules if name.split(".")[0].startswith(LAZY_PREFIXES)]
+    return total_ms, children, lazy_loaded
+
+
+def measure(module: str, runs: int) -> Dict:
+    """Median cold import time of module over runs fresh interpreters, with its slowest imports."""
+    samples = [_import_once(module) for _ in range(runs)]
+    totals = [total for total, _, _ in samples]
+    median_run = samples[totals.index(sorted(totals)[len(totals) // 2])]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "slowest_imports": sorted(median_run[1], key=lambda child: -child[1])[:10],
+        "lazy_modules_loaded": median_run[2],
+    }
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Check the builder's cold-start import time against a budget.")
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=300, help="Fail if the median import takes longer")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.runs)
+    failures = []
+    if result["median_ms"] > args.budget_ms:
+        failures.append(f"import {args.module} took {result['median_ms']} ms (budget {args.budget_ms:g} ms)")
+    if result["lazy_modules_loaded"]:
+        failures.append(f"imported at startup: {', '.join(result['lazy_modules_loaded'][:10])}")
+
+    if args.json:
+        print(json.dumps({**result, "budget_ms": args.budget_ms, "failures": failures}, indent=2))
+    else:
+        print(f"import {args.module}: median {result['median_ms']} ms, min {result['min_ms']} ms "
+              f"over {args.runs} runs (budget {args.budget_ms:g} ms)")
+        for name, cumulative_ms in result["slowest_imports"]:
+            print(f"   {cumulative_ms:>8.1f} ms  {name}")
+        for failure in failures:
+            print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
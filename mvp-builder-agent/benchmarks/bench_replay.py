@@ -0,0 +1,125 @@
+"""Replay a recorded build from its cassette, timing it and checking the output is reproduced."""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+# Written by every build but not part of its output
+_BUILD_RECORDS = {"build_manifest.json", "ledger.json", "trace.jsonl"}
+
+
+def output_digest(output_path: Path) -> str:
+    """SHA-256 over the paths and contents of a build's generated files"""
+    digest = hashlib.sha256()
+    for path in sorted(output_path.rglob("*")):
+        if path.is_file() and path.name not in _BUILD_RECORDS:
+            digest.update(str(path.relative_to(output_path)).encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def replay_build(
+    cassette_path: str,
+    builder_prompt: str,
+    provider: Optional[str],
+    model: Optional[str],
+    latency_scale: float,
+    use_async: bool = False,
+    build_options: Optional[Dict] = None,
+) -> Dict:
+    """
+    Run one build with every LLM call answered from the cassette.
+
+    Returns:
+        Wall time, responses replayed, requests not in the cassette and the
+        digest of the generated files
+    """
+    cassette = main.open_cassette(cassette_path, "replay", latency_scale)
+    # Pooled models would hold on to the previous run's cassette
+    main._llm_pool.clear()
+    with tempfile.TemporaryDirectory() as output_dir:
+        kwargs = dict(output_dir=output_dir, provider=provider, model=model, cassette=cassette, **(build_options or {}))
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if use_async:
+                asyncio.run(main.build_prototype_async(builder_prompt, **kwargs))
+            else:
+                main.build_prototype(builder_prompt, **kwargs)
+        wall_time = time.perf_counter() - start
+        return {
+            "wall_time_s": round(wall_time, 3),
+            "responses_replayed": cassette.replayed,
+            "requests_missed": cassette.misses,
+            "output_digest": output_digest(Path(output_dir)),
+        }
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay a build recorded with `main.py --record` and check its time and output."
+    )
+    parser.add_argument("cassette", help="Cassette recorded with --record")
+    parser.add_argument("--prompt", required=True, help="Builder prompt file the recorded build used")
+    parser.add_argument("--provider", help="Provider the recorded build used (default LLM_PROVIDER)")
+    parser.add_argument("--model", help="Model the recorded build used (default LLM_MODEL)")
+    parser.add_argument("--runs", type=int, default=3, help="Replays to time")
+    parser.add_argument("--latency", type=float, default=0.0, help="Multiple of the recorded latency to simulate")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Replay with build_prototype_async")
+    parser.add_argument("--batch", action="store_true", help="The recorded build batched small files")
+    parser.add_argument("--route-models", action="store_true", help="The recorded build routed steps to model tiers")
+    parser.add_argument("--budget-s", type=float, help="Fail if the median replay takes longer")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    builder_prompt = main.load_builder_prompt(args.prompt)
+    build_options = dict(batch_small_files=args.batch, route_models=args.route_models)
+    runs: List[Dict] = []
+    failures = []
+    # The first replay also imports the provider SDK, so it only counts towards the output check
+    for _ in range(args.runs + 1):
+        try:
+            runs.append(replay_build(
+                args.cassette, builder_prompt, args.provider, args.model, args.latency, args.use_async, build_options
+            ))
+        except Exception as e:
+            failures.append(f"replay failed: {e}")
+            break
+
+    digests = {run["output_digest"] for run in runs}
+    runs = runs[1:]
+    median = statistics.median(run["wall_time_s"] for run in runs) if runs else None
+    if len(digests) > 1:
+        failures.append("replays produced different files")
+    if any(run["requests_missed"] for run in runs):
+        failures.append("the build sent requests that aren't in the cassette")
+    if args.budget_s is not None and median is not None and median > args.budget_s:
+        failures.append(f"median replay took {median:.3f}s (budget {args.budget_s:g}s)")
+
+    if args.json:
+        print(json.dumps({"runs": runs, "median_s": median, "failures": failures}, indent=2))
+    else:
+        for number, run in enumerate(runs, 1):
+            print(f"run {number}: {run['wall_time_s']:.3f}s, {run['responses_replayed']} responses replayed, "
+                  f"output {run['output_digest'][:12]}")
+        if median is not None:
+            print(f"median {median:.3f}s at {args.latency:g}x recorded latency")
+        for failure in failures:
+            print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
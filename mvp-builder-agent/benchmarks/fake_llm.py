@@ -0,0 +1,149 @@
+"""Deterministic fake chat model that scripts a whole build, for offline benchmarks."""
+
+import asyncio
+import json
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+
+class CallCounter:
+    """Thread-safe count of calls, shared by every copy of a fake model."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def increment(self) -> None:
+        with self._lock:
+            self.count += 1
+
+
+def scripted_architecture() -> Dict:
+    return {
+        "tech_stack": {
+            "frontend": "None",
+            "backend": "FastAPI",
+            "database": "SQLite",
+            "deployment": "Docker",
+            "justification": "Benchmark fixture",
+        },
+        "architecture": {
+            "layers": ["api", "services", "models"],
+            "modules": ["core"],
+            "data_flow": "api -> services -> models",
+        },
+        "project_structure": {"app": {}},
+    }
+
+
+def scripted_plan(num_files: int) -> Dict:
+    """
+    A plan of num_files files over up to ten phases.
+
+    Each phase starts with an __init__.py and a constants module (batchable
+    boilerplate); every other file depends on two files of the previous phase,
+    so the dependency graph has realistic fan-in without being a chain.
+    """
+    num_phases = max(1, min(10, num_files // 10))
+    per_phase = [num_files // num_phases + (1 if i < num_files % num_phases else 0) for i in range(num_phases)]
+    phases: List[Dict] = []
+    previous: List[str] = []
+    for number, count in enumerate(per_phase, 1):
+        paths = [f"app/phase{number}/__init__.py", f"app/phase{number}/constants.py"][:count]
+        paths += [f"app/phase{number}/module_{index}.py" for index in range(count - len(paths))]
+        files = []
+        for index, path in enumerate(paths):
+            dependencies = []
+            if previous and not path.endswith(("__init__.py", "constants.py")):
+                dependencies = sorted({previous[index % len(previous)], previous[(index * 7 + 3) % len(previous)]})
+            files.append({"path": path, "purpose": f"Benchmark file {path}", "dependencies": dependencies})
+        phases.append({
+            "phase_number": number,
+            "name": f"Phase {number}",
+            "description": "Benchmark phase",
+            "estimated_complexity": ["low", "medium", "high"][number % 3],
+            "files_to_create": files,
+        })
+        previous = paths
+    return {"phases": phases}
+
+
+def scripted_code(file_path: str, lines: int) -> str:
+    name = re.sub(r"\W", "_", file_path.rsplit("/", 1)[-1].split(".")[0])
+    body = [f'"""Generated module {file_path}."""', "", f"{name.upper()}_VERSION = 1", ""]
+    for index in range(max(1, (lines - 4) // 4)):
+        body += [f"def {name}_step_{index}(value: int) -> int:", f"    return value + {index}", "", ""]
+    return "\n".join(body[:max(lines, 5)]).rstrip() + "\n"
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Fake model that answers each builder step with canned, deterministic payloads.
+
+    The step is recognized from the system prompt; file requests get code
+    sized by file_lines. Every call sleeps for `latency` seconds (without
+    blocking the event loop on ainvoke) and reports token usage estimated at
+    4 characters per token.
+    """
+
+    num_files: int = 10
+    latency: float = 0.0
+    file_lines: int = 40
+    model_name: str = "gpt-4o"
+    counter: CallCounter = Field(default_factory=CallCounter)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "num_files": self.num_files, "file_lines": self.file_lines}
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        self.counter.increment()
+        system_prompt = str(messages[0].content)
+        request = str(messages[-1].content)
+        if "software architect" in system_prompt:
+            text = json.dumps(scripted_architecture(), indent=2)
+        elif "implementation plans" in system_prompt:
+            text = json.dumps(scripted_plan(self.num_files), indent=2)
+        elif "technical writer" in system_prompt:
+            text = "# Benchmark Project\n\nGenerated offline.\n"
+        elif "several small project files" in system_prompt:
+            paths = re.findall(r"^- (\S+):", request, re.MULTILINE)
+            text = json.dumps({"files": [{"path": path, "content": scripted_code(path, 4)} for path in paths]})
+        else:
+            match = re.search(r"^- Path: (\S+)", request, re.MULTILINE)
+            file_path = match.group(1) if match else "module.py"
+            text = f"```python\n{scripted_code(file_path, self.file_lines)}```"
+
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = len(text) // 4
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"finish_reason": "stop", "model_name": self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
@@ -0,0 +1,164 @@
+"""Record/replay of a build's LLM traffic in a compressed cassette file."""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Literal, Optional, Sequence, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+CassetteMode = Literal["record", "replay"]
+
+
+class CassetteMiss(RuntimeError):
+    """A replayed build sent a request that isn't in the cassette."""
+
+
+class LLMCassette(BaseCache):
+    """
+    Records every LLM request and response of a build to a gzip-compressed
+    JSON Lines file, or replays them from it.
+
+    Pass it as a model's cache= in place of the response cache. When recording,
+    lookups always miss, so every call reaches the provider, and each response
+    is appended with the request it answered and how long the call took. When
+    replaying, every call is answered from the cassette, after sleeping
+    latency_scale times the recorded latency (0 answers at once). A request
+    that was never recorded raises CassetteMiss instead of reaching the
+    provider. Responses are stored whole (content, tool calls, usage metadata),
+    so a replay makes the same decisions and reports the same token usage as
+    the recorded build.
+    """
+
+    def __init__(self, path: str, mode: CassetteMode, latency_scale: float = 0.0):
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Start times of calls waiting for their response, by key
+        self._started: Dict[str, List[float]] = defaultdict(list)
+        # Recorded responses in call order, by key
+        self._responses: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._file = None
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        elif mode == "replay":
+            self._read()
+        else:
+            raise ValueError(f"Unknown cassette mode: {mode}. Must be one of: record, replay")
+
+    @property
+    def offline(self) -> bool:
+        """Whether calls are answered without reaching the provider (no API key needed)."""
+        return self.mode == "replay"
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def _read(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    self._responses[entry["key"]].append(entry)
+            except (EOFError, zlib.error):
+                # Cassette of a recording that was interrupted; keep what was flushed
+                pass
+
+    def _next_response(self, prompt: str, llm_string: str) -> Tuple[List[Generation], float]:
+        """The next recorded response to this request; a request repeated more often than recorded gets the last one"""
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                self.misses += 1
+                raise CassetteMiss(
+                    f"No recorded response for this request in {self.path} "
+                    "(the build's prompts or model settings differ from the recording)"
+                )
+            entry = responses.popleft() if len(responses) > 1 else responses[0]
+            self.replayed += 1
+        generations = [
+            ChatGeneration(message=messages_from_dict([generation["message"]])[0])
+            if "message" in generation
+            else Generation(text=generation["text"])
+            for generation in entry["generations"]
+        ]
+        return generations, entry["latency"] * self.latency_scale
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if self.mode == "record":
+            with self._lock:
+                self._started[self._key(prompt, llm_string)].append(time.perf_counter())
+            return None
+        generations, delay = self._next_response(prompt, llm_string)
+        if delay > 0:
+            time.sleep(delay)
+        return generations
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if self.mode == "record":
+            return self.lookup(prompt, llm_string)
+        generations, delay = self._next_response(prompt, llm_string)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if self.mode != "record":
+            return
+        key = self._key(prompt, llm_string)
+        entry = {
+            "key": key,
+            "llm": llm_string,
+            "request": json.loads(prompt),
+            "generations": [
+                {"message": message_to_dict(generation.message)}
+                if isinstance(generation, ChatGeneration)
+                else {"text": generation.text}
+                for generation in return_val
+            ],
+        }
+        with self._lock:
+            started = self._started.get(key)
+            # The last attempt of the call is the one that got this response
+            entry["latency"] = round(time.perf_counter() - started.pop(), 3) if started else 0.0
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._file.write(line + "\n")
+                # A sync flush keeps the cassette readable if the build is interrupted
+                self._file.flush()
+                self.recorded += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._responses.clear()
+
+    def close(self) -> None:
+        """Finish the cassette file of a recording."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
+    def summary(self) -> str:
+        if self.mode == "record":
+            return f"recorded {self.recorded} LLM responses to {self.path}"
+        missed = f", {self.misses} requests not in the cassette" if self.misses else ""
+        return f"replayed {self.replayed} LLM responses from {self.path}{missed}"
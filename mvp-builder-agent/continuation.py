@@ -0,0 +1,62 @@
+"""Detecting code cut off at the model's output limit and asking for the rest."""
+
+from typing import TYPE_CHECKING, Any, List
+
+from interfaces import estimate_tokens, summarize_interface
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+# Stop reasons of a response that hit the output token limit: finish_reason "length"
+# (OpenAI, Ollama), stop_reason "max_tokens" (Anthropic), done_reason "length" (Ollama)
+_LIMIT_REASONS = {"length", "max_tokens"}
+
+
+def is_truncated(message: Any) -> bool:
+    """Whether a response stopped at the output token limit rather than finishing."""
+    metadata = getattr(message, "response_metadata", None) or {}
+    reasons = (metadata.get("finish_reason"), metadata.get("stop_reason"), metadata.get("done_reason"))
+    return any(str(reason).lower() in _LIMIT_REASONS for reason in reasons if reason)
+
+
+def code_tail(code: str, max_tokens: int) -> str:
+    """The last whole lines of code within a token budget (at least one line)."""
+    lines = code.split("\n")
+    tail: List[str] = []
+    remaining = max_tokens
+    for line in reversed(lines):
+        remaining -= estimate_tokens(line) + 1
+        if remaining < 0 and tail:
+            break
+        tail.append(line)
+    return "\n".join(reversed(tail))
+
+
+def continuation_messages(
+    messages: List["BaseMessage"], code: str, file_path: str, file_purpose: str, max_tokens: int
+) -> List["BaseMessage"]:
+    """
+    The file's original request followed by the code written so far and a request for the rest.
+
+    Only the tail of the code (within max_tokens) is sent back, with a summary
+    of what comes before it, so each continuation costs about the same however
+    long the file grows. The purpose from the plan tells the model which
+    sections of the file are still missing.
+    """
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    tail = code_tail(code, max_tokens)
+    earlier = ""
+    if len(tail) < len(code):
+        head = code[: len(code) - len(tail)]
+        earlier = f""" Those are its last lines; earlier in the file:
+{summarize_interface(file_path, head)}"""
+    return [
+        *messages,
+        AIMessage(content=tail),
+        HumanMessage(content=f"""Your code for {file_path} was cut off at the output limit after the lines above.{earlier}
+
+The file must still cover everything in its purpose: {file_purpose}
+
+Continue with the next line. Don't repeat lines already written. Return ONLY the code, no explanations or markdown formatting."""),
+    ]
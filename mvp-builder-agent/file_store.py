@@ -0,0 +1,84 @@
+"""Generated file contents of a build, kept on disk instead of in memory."""
+
+import mmap
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, MutableMapping
+
+
+def read_mapped(path: Path) -> str:
+    """Read a UTF-8 file through a read-only memory map."""
+    with open(path, "rb") as f:
+        # Empty files can't be mapped
+        if f.seek(0, 2) == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[:].decode("utf-8")
+
+
+class GeneratedFileStore(MutableMapping[str, str]):
+    """
+    The existing_files mapping of a build, backed by the output directory.
+
+    Generated files are written to disk before they are stored here, so the
+    store only records which paths are built and keeps the most recently used
+    contents in an LRU capped at max_bytes. Any other file is read back lazily
+    through mmap when a dependent asks for it, so memory stays flat however
+    many files a plan has.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Insertion-ordered set of built paths
+        self._paths: Dict[str, None] = {}
+        self._hot: "OrderedDict[str, str]" = OrderedDict()
+        self._hot_bytes = 0
+        self._lock = threading.Lock()
+
+    def _remember(self, file_path: str, content: str) -> None:
+        """Cache content as most recently used, evicting the least recently used past max_bytes"""
+        size = len(content)  # characters, close enough to bytes for source code
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if file_path in self._hot:
+                self._hot_bytes -= len(self._hot.pop(file_path))
+            self._hot[file_path] = content
+            self._hot_bytes += size
+            while self._hot_bytes > self.max_bytes:
+                _, evicted = self._hot.popitem(last=False)
+                self._hot_bytes -= len(evicted)
+
+    def __getitem__(self, file_path: str) -> str:
+        if file_path not in self._paths:
+            raise KeyError(file_path)
+        with self._lock:
+            content = self._hot.get(file_path)
+            if content is not None:
+                self._hot.move_to_end(file_path)
+                return content
+        content = read_mapped(self.root / file_path)
+        self._remember(file_path, content)
+        return content
+
+    def __setitem__(self, file_path: str, content: str) -> None:
+        """Record a file that has been written to root / file_path with this content."""
+        self._paths[file_path] = None
+        self._remember(file_path, content)
+
+    def __delitem__(self, file_path: str) -> None:
+        del self._paths[file_path]
+        with self._lock:
+            if file_path in self._hot:
+                self._hot_bytes -= len(self._hot.pop(file_path))
+
+    def __contains__(self, file_path: object) -> bool:
+        return file_path in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._paths))
+
+    def __len__(self) -> int:
+        return len(self._paths)
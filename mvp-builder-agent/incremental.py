@@ -0,0 +1,58 @@
+"""Diffing implementation plans so a changed spec only rebuilds what it affects."""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+
+def diff_file_graphs(old_graph: Dict[str, Dict], new_graph: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """
+    Compare the files of two plans (see build_file_graph).
+
+    A file has changed when its purpose or its dependencies differ; moving it
+    to another phase alone doesn't change what gets generated. Purposes are
+    compared ignoring case, whitespace and trailing punctuation.
+
+    Returns:
+        {"added": [...], "removed": [...], "changed": [...]} in plan order
+    """
+    def signature(file_info: Dict) -> tuple:
+        purpose = " ".join(str(file_info.get("purpose") or "").lower().split()).rstrip(".;,! ")
+        return purpose, tuple(sorted(file_info["dependencies"]))
+
+    return {
+        "added": [path for path in new_graph if path not in old_graph],
+        "removed": [path for path in old_graph if path not in new_graph],
+        "changed": [
+            path for path, info in new_graph.items()
+            if path in old_graph and signature(info) != signature(old_graph[path])
+        ],
+    }
+
+
+def with_dependents(graph: Dict[str, Dict], paths: Iterable[str]) -> Set[str]:
+    """The given paths plus every file of the graph that transitively depends on one of them."""
+    dependents: Dict[str, List[str]] = defaultdict(list)
+    for path, info in graph.items():
+        for dep in info["dependencies"]:
+            dependents[dep].append(path)
+
+    affected = set(paths)
+    frontier = list(affected)
+    while frontier:
+        for dependent in dependents[frontier.pop()]:
+            if dependent not in affected:
+                affected.add(dependent)
+                frontier.append(dependent)
+    return affected
+
+
+def files_to_rebuild(old_graph: Dict[str, Dict], new_graph: Dict[str, Dict], diff: Dict[str, List[str]]) -> Set[str]:
+    """
+    Files of the new plan to regenerate: added and changed files and everything
+    depending on them, plus files that depended on a removed one.
+    """
+    affected = with_dependents(new_graph, diff["added"] + diff["changed"])
+    # Dependents of removed files, per the old plan (the new one no longer names them)
+    affected |= with_dependents(old_graph, diff["removed"]) - set(diff["removed"])
+    affected = with_dependents(new_graph, affected)
+    return {path for path in affected if path in new_graph}
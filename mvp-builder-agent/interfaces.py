@@ -0,0 +1,192 @@
+"""Compact interface summaries of generated files, used as dependency context."""
+
+import ast
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from pathlib import PurePosixPath
+from typing import List, Mapping, Optional
+
+# Declarations worth showing at the top level of a brace-delimited file, and
+# inside the classes/interfaces/structs they open, per language
+_BRACE_LANGUAGES = {
+    "js": (
+        re.compile(r"^(export\b|module\.exports\b)"),
+        re.compile(r"^(?:(?:public|protected|static|readonly|async|abstract|get|set|declare)\s+)*"
+                   r"(?!if\b|for\b|while\b|switch\b|return\b|catch\b|super\b|this\b)[A-Za-z_$][\w$]*\s*[?!]?\s*[(:<]"),
+    ),
+    "swift": (
+        re.compile(r"^(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|open|internal|final|indirect)\s+)*"
+                   r"(?:class|struct|enum|protocol|extension|func|let|var|typealias|actor)\b"),
+        re.compile(r"^(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|open|internal|static|class|override|mutating|final|required|convenience)\s+)*"
+                   r"(?:func|var|let|init|case|subscript|associatedtype)\b"),
+    ),
+    "kotlin": (
+        re.compile(r"^(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|internal|abstract|open|data|sealed|enum|annotation|inline|value|suspend|const)\s+)*"
+                   r"(?:class|interface|object|fun|val|var|typealias)\b"),
+        re.compile(r"^(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|internal|abstract|open|override|suspend|data|enum|const|lateinit|companion)\s+)*"
+                   r"(?:fun|val|var|class|object|constructor|init)\b"),
+    ),
+}
+
+_LANGUAGE_BY_SUFFIX = {
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".swift": "swift",
+    ".kt": "kotlin", ".kts": "kotlin",
+}
+
+_PRIVATE = re.compile(r"^(?:@\w+\s+)*(?:private|fileprivate)\b|^#")
+_COMMENTS_AND_STRINGS = re.compile(
+    r"//[^\n]*|/\*.*?\*/|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`",
+    re.DOTALL,
+)
+
+_SUMMARY_CACHE_SIZE = 4096
+_summary_cache: "OrderedDict[str, str]" = OrderedDict()
+_summary_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _python_signature(node: ast.AST, indent: str) -> List[str]:
+    lines = [f"{indent}@{ast.unparse(decorator)[:80]}" for decorator in node.decorator_list]
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    lines.append(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}: ...")
+    return lines
+
+
+def _python_docline(node: ast.AST, indent: str) -> List[str]:
+    docstring = ast.get_docstring(node)
+    return [f'{indent}"""{docstring.strip().splitlines()[0]}"""'] if docstring else []
+
+
+def _is_public(name: str) -> bool:
+    return not name.startswith("_") or name in ("__init__", "__call__")
+
+
+def _python_assignment(node: ast.AST, indent: str) -> Optional[str]:
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and _is_public(node.target.id):
+        value = f" = {ast.unparse(node.value)[:60]}" if node.value is not None else ""
+        return f"{indent}{node.target.id}: {ast.unparse(node.annotation)}{value}"
+    if isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) and _is_public(t.id) for t in node.targets):
+        names = " = ".join(target.id for target in node.targets)
+        return f"{indent}{names} = {ast.unparse(node.value)[:60]}"
+    return None
+
+
+def _python_interface(content: str) -> str:
+    tree = ast.parse(content)
+    lines = _python_docline(tree, "")
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_public(node.name):
+            lines.extend(_python_signature(node, ""))
+        elif isinstance(node, ast.ClassDef) and _is_public(node.name):
+            bases = ", ".join(ast.unparse(base) for base in [*node.bases, *node.keywords])
+            lines.extend(f"@{ast.unparse(decorator)[:80]}" for decorator in node.decorator_list)
+            lines.append(f"class {node.name}({bases}):" if bases else f"class {node.name}:")
+            lines.extend(_python_docline(node, "    "))
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_public(item.name):
+                    lines.extend(_python_signature(item, "    "))
+                elif (assignment := _python_assignment(item, "    ")) is not None:
+                    lines.append(assignment)
+        elif (assignment := _python_assignment(node, "")) is not None:
+            lines.append(assignment)
+    return "\n".join(lines)
+
+
+def _brace_interface(content: str, language: str) -> str:
+    top_level, member = _BRACE_LANGUAGES[language]
+    # Blank out comments and string contents so braces inside them don't count
+    code = _COMMENTS_AND_STRINGS.sub(lambda m: "" if m.group(0)[0] == "/" else m.group(0)[0] * 2, content)
+
+    lines: List[str] = []
+    depth = 0
+    container_depth: Optional[int] = None
+    source_lines = code.splitlines()
+    index = 0
+    while index < len(source_lines):
+        line = source_lines[index].strip()
+        index += 1
+        # Join the lines of a multi-line signature until its parentheses balance
+        header = line
+        while header.count("(") > header.count(")") and index < len(source_lines) and len(header) < 400:
+            header += " " + source_lines[index].strip()
+            index += 1
+
+        pattern = top_level if depth == 0 else member if depth == container_depth else None
+        if pattern is not None and header and pattern.search(header) and not _PRIVATE.search(header):
+            indent = "" if depth == 0 else "  "
+            lines.append(indent + header.split("{", 1)[0].rstrip().rstrip("=").rstrip())
+            if depth == 0 and "{" in header:
+                container_depth = 1
+
+        depth += header.count("{") - header.count("}")
+        depth = max(depth, 0)
+        if depth == 0:
+            container_depth = None
+    return "\n".join(lines)
+
+
+def _summarize(file_path: str, content: str) -> str:
+    suffix = PurePosixPath(file_path).suffix.lower()
+    try:
+        if suffix == ".py":
+            summary = _python_interface(content)
+        elif suffix in _LANGUAGE_BY_SUFFIX:
+            summary = _brace_interface(content, _LANGUAGE_BY_SUFFIX[suffix])
+        else:
+            summary = ""
+    except (SyntaxError, ValueError, RecursionError):
+        summary = ""
+    # Config, markup and unparseable files: the head of the file is the best we have
+    return summary or content[:600].strip()
+
+
+def summarize_interface(file_path: str, content: str) -> str:
+    """
+    Compact signature summary of a generated file.
+
+    Python is summarized with ast (public classes, methods, functions and
+    constants); JS/TS, Swift and Kotlin with a brace-depth aware regex
+    tokenizer (exported/top-level declarations and their members). Other files
+    fall back to their first few hundred characters. Summaries are cached by
+    content hash.
+    """
+    key = hashlib.sha256(f"{file_path}\0{content}".encode("utf-8")).hexdigest()
+    with _summary_lock:
+        if key in _summary_cache:
+            _summary_cache.move_to_end(key)
+            return _summary_cache[key]
+
+    summary = _summarize(file_path, content)
+    with _summary_lock:
+        _summary_cache[key] = summary
+        if len(_summary_cache) > _SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+    return summary
+
+
+def format_dependency_context(dependencies: List[str], existing_files: Mapping[str, str], max_tokens: int) -> str:
+    """Interface summaries of the dependencies that exist, within a token budget."""
+    blocks: List[str] = []
+    remaining = max_tokens
+    available = [dep for dep in dependencies if dep in existing_files]
+    for count, dep in enumerate(available):
+        block = f"- {dep}:\n{summarize_interface(dep, existing_files[dep])}"
+        tokens = estimate_tokens(block)
+        if tokens > remaining:
+            if remaining > 50:
+                blocks.append(block[: remaining * 4].rstrip() + "\n  ...")
+            omitted = len(available) - count - (1 if remaining > 50 else 0)
+            if omitted:
+                blocks.append(f"({omitted} more dependencies omitted)")
+            break
+        blocks.append(block)
+        remaining -= tokens
+    return "\n\n".join(blocks)
@@ -0,0 +1,208 @@
+"""Per-build ledger of LLM token usage and cost, with an optional budget."""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+LEDGER_FILENAME = "ledger.json"
+
+# What the current LLM call is for ("architecture", a file path, ...)
+_call_label: ContextVar[str] = ContextVar("call_label", default="")
+# Which model tier handled it, when the build routes steps to tiers
+_call_tier: ContextVar[Optional[str]] = ContextVar("call_tier", default=None)
+
+
+@contextmanager
+def ledger_label(label: str, tier: Optional[str] = None) -> Iterator[None]:
+    """Label every LLM call made inside the block (and its model tier) in the ledger."""
+    label_token = _call_label.set(label)
+    tier_token = _call_tier.set(tier)
+    try:
+        yield
+    finally:
+        _call_tier.reset(tier_token)
+        _call_label.reset(label_token)
+
+
+def price_usage(pricing: Dict[str, Dict], model: str, input_tokens: int, cached_tokens: int, output_tokens: int) -> Optional[float]:
+    """Dollar cost of one call from MODEL_PRICING, or None if the model has no pricing entry."""
+    prices = pricing.get(model)
+    if prices is None:
+        return None
+    cached_price = prices.get("cached_input")
+    if cached_price is None:
+        cached_price = prices["input"]
+    return (
+        (input_tokens - cached_tokens) * prices["input"]
+        + cached_tokens * cached_price
+        + output_tokens * prices["output"]
+    ) / 1_000_000
+
+
+def _cache_read_tokens(message: Any, usage: Dict[str, Any]) -> int:
+    """Input tokens served from the provider's prompt cache."""
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached is None:
+        # Integrations that don't normalize it still report it in the raw usage
+        metadata = getattr(message, "response_metadata", None) or {}
+        raw_usage = metadata.get("token_usage") or metadata.get("usage") or {}
+        cached = (
+            (raw_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+            or raw_usage.get("cache_read_input_tokens")
+        )
+    return cached or 0
+
+
+class BuildLedger(BaseCallbackHandler):
+    """
+    Callback handler that records token usage and cost of every LLM call.
+
+    Usage comes from each response's usage_metadata; input tokens served from
+    the provider's prompt cache are priced at the model's cached_input rate.
+    The ledger is saved to ledger.json in the output directory after each call.
+    Once max_cost dollars or max_tokens tokens are spent, `exhausted` is True.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self,
+        path: Path,
+        pricing: Dict[str, Dict],
+        max_cost: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        resume: bool = False,
+    ):
+        self.path = path
+        self.pricing = pricing
+        self.max_cost = max_cost
+        self.max_tokens = max_tokens
+        self.calls: List[Dict[str, Any]] = []
+        self._models: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+        if resume and path.exists():
+            # A resumed build keeps counting against the same budget
+            self.calls = json.loads(path.read_text(encoding="utf-8")).get("calls", [])
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs: Any) -> None:
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        self._models[run_id] = (
+            metadata.get("ls_provider") or params.get("_type"),
+            metadata.get("ls_model_name") or params.get("model") or params.get("model_name"),
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._models.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        provider, model = self._models.pop(run_id, (None, None))
+        input_tokens = output_tokens = cached_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                cached_tokens += _cache_read_tokens(message, usage)
+
+        self.record(_call_label.get(), provider, model, input_tokens, cached_tokens, output_tokens, _call_tier.get())
+
+    def record(
+        self,
+        label: str,
+        provider: Optional[str],
+        model: Optional[str],
+        input_tokens: int,
+        cached_tokens: int,
+        output_tokens: int,
+        tier: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self.calls.append({
+                "label": label,
+                "tier": tier,
+                "provider": provider,
+                "model": model,
+                "input_tokens": input_tokens,
+                "cached_input_tokens": cached_tokens,
+                "output_tokens": output_tokens,
+                "cost": price_usage(self.pricing, model, input_tokens, cached_tokens, output_tokens),
+            })
+            self.save()
+
+    @property
+    def total_cost(self) -> float:
+        return sum(call["cost"] or 0.0 for call in self.calls)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(call["input_tokens"] + call["output_tokens"] for call in self.calls)
+
+    @property
+    def exhausted(self) -> bool:
+        return (
+            (self.max_cost is not None and self.total_cost >= self.max_cost)
+            or (self.max_tokens is not None and self.total_tokens >= self.max_tokens)
+        )
+
+    def totals(self) -> Dict[str, Any]:
+        input_tokens = sum(call["input_tokens"] for call in self.calls)
+        cached_tokens = sum(call["cached_input_tokens"] for call in self.calls)
+        return {
+            "calls": len(self.calls),
+            "input_tokens": input_tokens,
+            "cached_input_tokens": cached_tokens,
+            "cache_hit_rate": round(cached_tokens / input_tokens, 4) if input_tokens else 0.0,
+            "output_tokens": sum(call["output_tokens"] for call in self.calls),
+            "cost": round(self.total_cost, 6),
+            "unpriced_calls": sum(1 for call in self.calls if call["cost"] is None),
+            "by_tier": self._tier_totals(),
+        }
+
+    def _tier_totals(self) -> Dict[str, Dict[str, Any]]:
+        tiers: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            if call.get("tier") is None:
+                continue
+            tier = tiers.setdefault(call["tier"], {"calls": 0, "cost": 0.0, "models": []})
+            tier["calls"] += 1
+            tier["cost"] = round(tier["cost"] + (call["cost"] or 0.0), 6)
+            if call["model"] not in tier["models"]:
+                tier["models"].append(call["model"])
+        return tiers
+
+    def summary(self) -> str:
+        totals = self.totals()
+        return (
+            f"${totals['cost']:.4f} over {totals['calls']} calls "
+            f"({totals['input_tokens']:,} in, {totals['cached_input_tokens']:,} cached "
+            f"[{totals['cache_hit_rate']:.0%} prompt cache hits], "
+            f"{totals['output_tokens']:,} out tokens)"
+        )
+
+    def tier_summary(self) -> List[str]:
+        """One line per model tier used, for builds that route steps to tiers."""
+        return [
+            f"{tier} ({', '.join(str(model) for model in totals['models'])}): "
+            f"{totals['calls']} calls, ${totals['cost']:.4f}"
+            for tier, totals in self._tier_totals().items()
+        ]
+
+    def save(self) -> None:
+        data = {
+            "budget": {"max_cost": self.max_cost, "max_tokens": self.max_tokens},
+            "totals": self.totals(),
+            "calls": self.calls,
+        }
+        tmp_path = self.path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,137 @@
+"""On-disk, content-addressed cache for LLM responses."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+
+class DiskResponseCache(BaseCache):
+    """
+    LangChain cache backed by a SQLite file with size-bounded LRU eviction.
+
+    Pass an instance as `cache=` to a chat model and every invoke/ainvoke is
+    looked up first. LangChain hands the cache the serialized messages as
+    `prompt` and the model's provider class, model name and temperature as
+    `llm_string`; entries are keyed by a SHA-256 of both.
+
+    Only the response text, tool calls (structured output on Anthropic) and
+    response metadata are stored. Token usage is dropped because a cache hit
+    costs nothing.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.path = Path(cache_dir) / "responses.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        return [
+            ChatGeneration(message=AIMessage(
+                content=entry["content"],
+                response_metadata=entry["response_metadata"],
+                tool_calls=entry.get("tool_calls", []),
+            ))
+            if entry["type"] == "chat"
+            else Generation(text=entry["content"])
+            for entry in json.loads(row[0])
+        ]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        entries: list[dict[str, Any]] = []
+        for generation in return_val:
+            if isinstance(generation, ChatGeneration):
+                message = generation.message
+                entries.append({
+                    "type": "chat",
+                    "content": message.content,
+                    "response_metadata": message.response_metadata,
+                    "tool_calls": getattr(message, "tool_calls", []),
+                })
+            else:
+                entries.append({"type": "text", "content": generation.text, "response_metadata": {}})
+
+        value = json.dumps(entries, default=str)
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+def lookup_response(llm: BaseChatModel, messages: Sequence[BaseMessage]) -> Optional[BaseMessage]:
+    """
+    Cached response for messages, for calls that bypass LangChain's cache.
+
+    stream()/astream() never consult the model's cache, so streamed calls look
+    up and store responses through these helpers with the same key as invoke.
+    """
+    if not isinstance(llm.cache, BaseCache):
+        return None
+    generations = llm.cache.lookup(dumps(list(messages)), llm._get_llm_string())
+    return generations[0].message if generations else None
+
+
+async def alookup_response(llm: BaseChatModel, messages: Sequence[BaseMessage]) -> Optional[BaseMessage]:
+    """Async twin of lookup_response, for caches that answer slowly (e.g. a replay with latency)"""
+    if not isinstance(llm.cache, BaseCache):
+        return None
+    generations = await llm.cache.alookup(dumps(list(messages)), llm._get_llm_string())
+    return generations[0].message if generations else None
+
+
+def store_response(llm: BaseChatModel, messages: Sequence[BaseMessage], message: BaseMessage) -> None:
+    """Store a streamed response under the same key invoke would use."""
+    if isinstance(llm.cache, BaseCache):
+        llm.cache.update(dumps(list(messages)), llm._get_llm_string(), [ChatGeneration(message=message)])
@@ -0,0 +1,89 @@
+"""Bounded pool of chat model clients reused across steps, builds and UI reruns."""
+
+import json
+import threading
+import urllib.request
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
+
+class ChatModelPool:
+    """
+    LRU pool of chat model instances.
+
+    Each instance owns its provider SDK client and with it an HTTP connection
+    pool, so handing the same instance to every caller with the same key keeps
+    connections alive instead of paying new TLS handshakes per step. Keys are
+    (provider, model, temperature, base_url, ...); past max_size the least
+    recently used instance is dropped.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._models: "OrderedDict[Tuple[Hashable, ...], BaseChatModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Hashable, ...], create: Callable[[], "BaseChatModel"]) -> "BaseChatModel":
+        """The pooled instance for key, created with create() on a miss."""
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            llm = create()
+            self._models[key] = llm
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+            return llm
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+def warm_ollama_model(base_url: str, model: str, keep_alive: str) -> threading.Thread:
+    """
+    Load an Ollama model into memory in the background and keep it there for keep_alive.
+
+    A generate request without a prompt only loads the model, so the first
+    real call doesn't wait for a cold load. Failures (server down, unknown
+    model) are ignored here; the real call reports them.
+    """
+    def warm() -> None:
+        request = urllib.request.Request(
+            f"{base_url.rstrip('/')}/api/generate",
+            data=json.dumps({"model": model, "keep_alive": keep_alive}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                response.read()
+        except OSError:
+            pass
+
+    thread = threading.Thread(target=warm, name=f"ollama-warm-{model}", daemon=True)
+    thread.start()
+    return thread
+
+
+def ollama_has_model(base_url: str, model: str) -> Optional[bool]:
+    """
+    Whether the Ollama server has pulled model, per its /api/tags list.
+
+    A model without a tag matches any tag of it ("llama3.2" matches
+    "llama3.2:latest"). Returns None when the server can't be asked.
+    """
+    try:
+        with urllib.request.urlopen(f"{base_url.rstrip('/')}/api/tags", timeout=5) as response:
+            tags = json.loads(response.read()).get("models", [])
+    except (OSError, ValueError):
+        return None
+    names = {tag.get("name", "") for tag in tags} | {tag.get("model", "") for tag in tags}
+    if ":" in model:
+        return model in names
+    return any(name == model or name.startswith(model + ":") for name in names)
@@ -1,11 +1,54 @@
+from __future__ import annotations
+
 import os
+import re
 import json
+import asyncio
+import argparse
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional, Literal
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Mapping, MutableMapping, Optional, Literal
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.language_models import BaseChatModel
+
+from architecture_context import (
+    architecture_outline, compact_json, context_token_savings, file_architecture_context, shared_architecture,
+)
+from file_store import GeneratedFileStore
+from manifest import BuildManifest
+from interfaces import format_dependency_context
+from batching import collapse_batches, group_small_files
+from routing import ModelRouter
+from incremental import diff_file_graphs, files_to_rebuild
+from llm_pool import ChatModelPool, ollama_has_model, warm_ollama_model
+from retry import acall_with_retry, call_with_retry
+from tracing import TRACE_FILENAME, BuildTracer, annotate_span, count_retry, trace_span
+from validation import validate_files
+from continuation import continuation_messages, is_truncated
+from seeding import seed_structure, structure_files
+from templates import TemplateLibrary, default_library, template_context
+from structured import (
+    StructuredOutputError,
+    loads_lenient,
+    parse_structured,
+    repair_messages,
+    response_text,
+    structured_runnable,
+)
+from streaming import CodeFenceFilter, StreamingFileWriter, chunk_text
+from scheduler import build_file_graph, iter_file_graph, iter_file_graph_async, select_files
+
+# langchain_core and the provider SDKs take most of a second to import, so they
+# (and the modules built on them) are imported where first needed, not at startup
+if TYPE_CHECKING:
+    from langchain_core.caches import BaseCache
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import BaseMessage, HumanMessage
+    from cassette import LLMCassette
+    from ledger import BuildLedger
+    from llm_cache import DiskResponseCache
 
 load_dotenv(override=True)
 
@@ -18,10 +61,44 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 DEFAULT_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
 DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
 BUILD_OUTPUT_DIR = os.getenv("BUILD_OUTPUT_DIR", "generated_prototype")
+BUILD_MAX_WORKERS = int(os.getenv("BUILD_MAX_WORKERS", "4"))
+# Per-user by default: the cache holds full prompts and responses, so it stays out of project directories
+BUILD_CACHE_DIR = os.path.expanduser(os.getenv(
+    "BUILD_CACHE_DIR", os.path.join(os.getenv("XDG_CACHE_HOME") or "~/.cache", "mvp-builder", "llm_cache")
+))
+BUILD_CACHE_MAX_MB = float(os.getenv("BUILD_CACHE_MAX_MB", "500"))
+BUILD_DEPENDENCY_CONTEXT_TOKENS = int(os.getenv("BUILD_DEPENDENCY_CONTEXT_TOKENS", "1500"))
+BUILD_BATCH_MAX_FILES = int(os.getenv("BUILD_BATCH_MAX_FILES", "8"))
+# Generated file contents kept in memory for dependency context; the rest is read back from disk
+BUILD_FILE_CACHE_MB = float(os.getenv("BUILD_FILE_CACHE_MB", "16"))
+# Models for the fast and standard tiers with --route-models ("model" or "provider:model")
+BUILD_FAST_MODEL = os.getenv("BUILD_FAST_MODEL", "")
+BUILD_STANDARD_MODEL = os.getenv("BUILD_STANDARD_MODEL", "")
+# Attempts per LLM call on rate limits and transient errors, with exponential backoff
+# (seconds), and end-of-build rounds retrying files that still failed
+BUILD_LLM_ATTEMPTS = int(os.getenv("BUILD_LLM_ATTEMPTS", "5"))
+BUILD_RETRY_BASE_DELAY = float(os.getenv("BUILD_RETRY_BASE_DELAY", "1"))
+BUILD_RETRY_MAX_DELAY = float(os.getenv("BUILD_RETRY_MAX_DELAY", "60"))
+BUILD_RETRY_ROUNDS = int(os.getenv("BUILD_RETRY_ROUNDS", "1"))
+# Rounds of regenerating files that fail the post-build syntax check
+BUILD_VALIDATION_ROUNDS = int(os.getenv("BUILD_VALIDATION_ROUNDS", "2"))
+# Continuation calls for a file cut off at the output limit, and tokens of its code resent with each
+BUILD_MAX_CONTINUATIONS = int(os.getenv("BUILD_MAX_CONTINUATIONS", "4"))
+BUILD_CONTINUATION_CONTEXT_TOKENS = int(os.getenv("BUILD_CONTINUATION_CONTEXT_TOKENS", "2000"))
+# Output limit for asking again for an architecture or plan that was cut off at the model's limit
+BUILD_STRUCTURED_MAX_TOKENS = int(os.getenv("BUILD_STRUCTURED_MAX_TOKENS", "16384"))
+# Client-side rate limits by "provider" or "provider:model", e.g.
+# {"openai": {"rpm": 500, "tpm": 30000}, "anthropic:claude-3-haiku-20240307": {"rpm": 50}}
+BUILD_RATE_LIMITS = json.loads(os.getenv("BUILD_RATE_LIMITS", "{}"))
+# Chat model clients kept alive for reuse, and how long Ollama keeps a model loaded
+BUILD_LLM_POOL_SIZE = int(os.getenv("BUILD_LLM_POOL_SIZE", "8"))
+BUILD_OLLAMA_KEEP_ALIVE = os.getenv("BUILD_OLLAMA_KEEP_ALIVE", "30m")
+# Directory of extra boilerplate templates, laid out as <stack>/<path pattern>
+BUILD_TEMPLATE_DIR = os.getenv("BUILD_TEMPLATE_DIR", "")
 
 # Pricing information per million tokens (as of December 2024)
 # Format: {model_name: {"input": price, "output": price, "cached_input": price or None}}
-MODEL_PRICING = {wqenqwjneiquwjenqwkjne
+MODEL_PRICING = {
     # OpenAI Models
     "gpt-5.2-pro": {"input": 21.00, "output": 168.00, "cached_input": None},
     "gpt-5.2-thinking": {"input": 1.75, "output": 14.00, "cached_input": 0.175},
@@ -94,11 +171,20 @@ AVAILABLE_MODELS = {
     ],
 }
 
+# Cheaper models per provider for routine build steps (see routing.py); the
+# flagship tier is always the model the build was started with
+MODEL_TIERS = {
+    "openai": {"fast": "gpt-4o-mini", "standard": "gpt-4o"},
+    "anthropic": {"fast": "claude-3-haiku-20240307", "standard": "claude-3-5-sonnet-20241022"},
+    "ollama": {"fast": "llama3.2", "standard": "deepseek-coder"},
+}
+
 
 def create_llm(
     provider: Literal["openai", "anthropic", "ollama"] = DEFAULT_PROVIDER,
     model: str = DEFAULT_MODEL,
     temperature: float = 0.1,
+    cache: Optional[BaseCache] = None,
 ) -> BaseChatModel:
     """
     Factory function to create an LLM instance from the specified provider.
@@ -107,19 +193,39 @@ def create_llm(
         provider: One of "openai", "anthropic", or "ollama"
         model: Model name for the provider
         temperature: Temperature for generation (default 0.1 for consistent code)
+        cache: Response cache consulted before every call (see get_response_cache),
+            or a cassette recording or replaying the calls
     
     Returns:
         BaseChatModel instance
+    
+    Calls are paced by the shared BUILD_RATE_LIMITS limiter for the provider/model.
+    SDK retries are disabled; the generators retry with call_with_retry instead.
     """
+    from ratelimit import rate_limiter_for
+    
+    rate_limiter = rate_limiter_for(provider, model, BUILD_RATE_LIMITS)
+    callbacks = [rate_limiter] if rate_limiter is not None else None
+    # A replaying cassette answers every call, so no API key is needed
+    offline = getattr(cache, "offline", False)
+    
+    # Provider SDKs are imported on first use; they dominate the CLI's startup time
     if provider == "openai":
-        if not OPENAI_API_KEY:
+        from langchain_openai import ChatOpenAI
+        
+        if not OPENAI_API_KEY and not offline:
             raise RuntimeError(
                 "OPENAI_API_KEY is not set. Add it to a .env file in mvp-builder-agent/."
             )
         return ChatOpenAI(
             model=model,
             temperature=temperature,
-            api_key=OPENAI_API_KEY,
+            api_key=OPENAI_API_KEY or "offline",
+            cache=cache,
+            stream_usage=True,
+            max_retries=0,
+            rate_limiter=rate_limiter,
+            callbacks=callbacks,
         )
     
     elif provider == "anthropic":
@@ -130,14 +236,18 @@ def create_llm(
                 "langchain-anthropic is not installed. Run: uv sync"
             )
         
-        if not ANTHROPIC_API_KEY:
+        if not ANTHROPIC_API_KEY and not offline:
             raise RuntimeError(
                 "ANTHROPIC_API_KEY is not set. Add it to a .env file in mvp-builder-agent/."
             )
         return ChatAnthropic(
             model=model,
             temperature=temperature,
-            api_key=ANTHROPIC_API_KEY,
+            api_key=ANTHROPIC_API_KEY or "offline",
+            cache=cache,
+            max_retries=0,
+            rate_limiter=rate_limiter,
+            callbacks=callbacks,
         )
     
     elif provider == "ollama":
@@ -152,42 +262,114 @@ def create_llm(
             model=model,
             temperature=temperature,
             base_url=OLLAMA_BASE_URL,
+            keep_alive=BUILD_OLLAMA_KEEP_ALIVE,
+            cache=cache,
+            rate_limiter=rate_limiter,
+            callbacks=callbacks,
         )
     
     else:
         raise ValueError(f"Unknown provider: {provider}. Must be one of: openai, anthropic, ollama")
 
 
-# Global LLM instance (lazy initialization)
-_llm: Optional[BaseChatModel] = None
-_provider: str = DEFAULT_PROVIDER
-_model: str = DEFAULT_MODEL
+# Shared pool of LLM instances (see get_llm)
+_llm_pool = ChatModelPool(BUILD_LLM_POOL_SIZE)
 
 
 def get_llm(
     provider: Optional[Literal["openai", "anthropic", "ollama"]] = None,
     model: Optional[str] = None,
+    cache: Optional[BaseCache] = None,
+    temperature: float = 0.1,
 ) -> BaseChatModel:
     """
-    Get or initialize the LLM instance.
-    If provider/model are provided, creates a new instance.
-    Otherwise, uses cached instance or creates with defaults.
+    Get an LLM instance from the shared pool, creating it on first use.
+    
+    Instances are keyed by provider, model, temperature, base URL and cache, so
+    every step, build and UI rerun with the same settings reuses one client and
+    its open connections. Ollama models are warmed up in the background when
+    first created and kept loaded for BUILD_OLLAMA_KEEP_ALIVE.
+    
+    Args:
+        provider: One of "openai", "anthropic", or "ollama" (default LLM_PROVIDER)
+        model: Model name for the provider (default LLM_MODEL)
+        cache: Response cache consulted before every call (see get_response_cache)
+        temperature: Temperature for generation
+    """
+    provider = provider or DEFAULT_PROVIDER
+    model = model or DEFAULT_MODEL
+    base_url = OLLAMA_BASE_URL if provider == "ollama" else None
+    key = (provider, model, temperature, base_url, id(cache) if cache is not None else None)
+    
+    def create() -> BaseChatModel:
+        llm = create_llm(provider, model, temperature, cache=cache)
+        if provider == "ollama" and not getattr(cache, "offline", False):
+            warm_ollama_model(OLLAMA_BASE_URL, model, BUILD_OLLAMA_KEEP_ALIVE)
+        return llm
+    
+    return _llm_pool.get(key, create)
+
+
+# Shared on-disk response cache (lazy initialization)
+_response_cache: Optional[DiskResponseCache] = None
+
+
+def get_response_cache() -> DiskResponseCache:
+    """
+    Get or initialize the on-disk LLM response cache.
+    Lives in BUILD_CACHE_DIR and is capped at BUILD_CACHE_MAX_MB (least recently used entries are evicted).
+    """
+    from llm_cache import DiskResponseCache
+    
+    global _response_cache
+    
+    if _response_cache is None:
+        _response_cache = DiskResponseCache(BUILD_CACHE_DIR, int(BUILD_CACHE_MAX_MB * 1024 * 1024))
+    
+    return _response_cache
+
+
+def open_cassette(path: str, mode: Literal["record", "replay"], latency_scale: float = 0.0) -> LLMCassette:
+    """
+    Open a cassette to record a build's LLM traffic to, or replay it from.
+    
+    Args:
+        path: Cassette file (gzip-compressed JSON Lines, e.g. build.jsonl.gz)
+        mode: "record" calls the provider and saves every request and response;
+            "replay" answers every call from the cassette, offline
+        latency_scale: When replaying, wait this multiple of each call's recorded
+            latency before answering (0 answers at once, 1 as fast as the recording)
     """
-    global _llm, _provider, _model
+    from cassette import LLMCassette
     
-    # If provider/model specified, create new instance
-    if provider is not None or model is not None:
-        provider = provider or _provider or DEFAULT_PROVIDER
-        model = model or _model or DEFAULT_MODEL
-        return create_llm(provider, model)
+    return LLMCassette(path, mode, latency_scale)
+
+
+def _build_cache(use_cache: bool, cassette: Optional[LLMCassette]) -> Optional[BaseCache]:
+    """The cassette if the build records or replays, else the response cache if enabled"""
+    if cassette is not None:
+        return cassette
+    return get_response_cache() if use_cache else None
+
+
+# Shared template library (lazy initialization)
+_template_library: Optional[TemplateLibrary] = None
+
+
+def get_template_library() -> TemplateLibrary:
+    """
+    Get or initialize the library of boilerplate templates.
+    Built-in templates plus any in BUILD_TEMPLATE_DIR, which take precedence.
+    """
+    global _template_library
     
-    # Otherwise, use cached instance or create with defaults
-    if _llm is None:
-        _provider = DEFAULT_PROVIDER
-        _model = DEFAULT_MODEL
-        _llm = create_llm(_provider, _model)
+    if _template_library is None:
+        _template_library = default_library()
+        if BUILD_TEMPLATE_DIR and Path(BUILD_TEMPLATE_DIR).is_dir():
+            loaded = _template_library.load_directory(Path(BUILD_TEMPLATE_DIR))
+            print(f"🧩 Loaded {loaded} templates from {BUILD_TEMPLATE_DIR}")
     
-    return _llm
+    return _template_library
 
 
 def get_model_pricing(model_name: str) -> Optional[Dict]:
@@ -254,13 +436,46 @@ def create_project_structure(base_dir: Path, structure: Dict) -> None:
             item_path.write_text(content, encoding="utf-8")
 
 
-def generate_tech_stack_and_architecture(
-    builder_prompt: str,
-    llm: Optional[BaseChatModel] = None,
-) -> Dict:
-    """
-    Step 1: Generate tech stack choice and high-level architecture
-    """
+def _model_name(runnable) -> Optional[str]:
+    llm_instance = getattr(runnable, "bound", runnable)
+    return getattr(llm_instance, "model_name", None) or getattr(llm_instance, "model", None)
+
+
+def _trace_usage(message: BaseMessage) -> None:
+    """Record a response's token counts on the current trace span"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    annotate_span(
+        input_tokens=usage.get("input_tokens", 0),
+        cached_tokens=(usage.get("input_token_details") or {}).get("cache_read", 0),
+        output_tokens=usage.get("output_tokens", 0),
+    )
+
+
+def _invoke(runnable, messages: List[BaseMessage], **attributes) -> BaseMessage:
+    """invoke with jittered exponential backoff on rate limits and transient errors"""
+    with trace_span("llm", "llm", model=_model_name(runnable), **attributes):
+        response = call_with_retry(
+            lambda: runnable.invoke(messages), BUILD_LLM_ATTEMPTS, BUILD_RETRY_BASE_DELAY, BUILD_RETRY_MAX_DELAY,
+            on_retry=count_retry,
+        )
+        _trace_usage(response)
+        return response
+
+
+async def _ainvoke(runnable, messages: List[BaseMessage], **attributes) -> BaseMessage:
+    """Async twin of _invoke"""
+    with trace_span("llm", "llm", model=_model_name(runnable), **attributes):
+        response = await acall_with_retry(
+            lambda: runnable.ainvoke(messages), BUILD_LLM_ATTEMPTS, BUILD_RETRY_BASE_DELAY, BUILD_RETRY_MAX_DELAY,
+            on_retry=count_retry,
+        )
+        _trace_usage(response)
+        return response
+
+
+def _architecture_messages(builder_prompt: str) -> List[BaseMessage]:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    
     system_prompt = """You are an expert software architect specializing in modern application development.
 You excel at choosing the right tech stack and designing scalable, maintainable architectures.
 
@@ -285,44 +500,135 @@ Respond in JSON format with this structure:
     },
     "project_structure": {
         "directory_name": {
-            "file_name": "file content or null for directories"
+            "file_name": "complete file content, or null for a file the implementation plan will create"
         }
     }
 }"""
 
-    messages = [
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=f"Builder Prompt:\n\n{builder_prompt}\n\nGenerate the tech stack and architecture plan.")
     ]
+
+
+def _structured_failure(what: str, error: StructuredOutputError, text: str) -> RuntimeError:
+    return RuntimeError(f"Failed to parse {what} JSON: {error}\nResponse was: {text}")
+
+
+# Setting that caps a model's output tokens, by provider
+_OUTPUT_LIMIT_FIELDS = {"openai-chat": "max_tokens", "anthropic-chat": "max_tokens", "chat-ollama": "num_predict"}
+
+
+def _with_more_output(llm_instance: BaseChatModel) -> Optional[BaseChatModel]:
+    """The model with a higher output limit, or None if its limit can't be raised"""
+    field = _OUTPUT_LIMIT_FIELDS.get(llm_instance._llm_type)
+    if field is None:
+        return None
+    current = getattr(llm_instance, field, None) or 0
+    return llm_instance.model_copy(update={field: max(BUILD_STRUCTURED_MAX_TOKENS, current * 2)})
+
+
+def _truncated_failure(what: str) -> RuntimeError:
+    # A cut-off response may still parse once its brackets are closed, minus whole phases or sections
+    return RuntimeError(
+        f"The {what} was cut off at the model's output limit; a partial {what} is not used. "
+        f"Raise BUILD_STRUCTURED_MAX_TOKENS, shorten the builder prompt or use a model with a larger output limit"
+    )
+
+
+def _retry_with_more_output(llm_instance: BaseChatModel, what: str) -> BaseChatModel:
+    larger = _with_more_output(llm_instance)
+    if larger is None:
+        raise _truncated_failure(what)
+    print(f"✂️  The {what} was cut off at the output limit, asking again with a larger limit")
+    return larger
+
+
+def _generate_structured(llm_instance: BaseChatModel, messages: List[BaseMessage], schema, what: str) -> Dict:
+    """
+    Call the model in JSON/tool mode and validate the response against schema.
     
-    llm_instance = llm or get_llm()
-    response = llm_instance.invoke(messages)
+    A response cut off at the output limit is asked for again once with a
+    larger limit, and fails if it is cut off again. A response that still
+    doesn't parse or validate gets one small repair call (the broken JSON and
+    the error, not the original prompt) instead of a full regeneration.
+    """
+    runnable = structured_runnable(llm_instance, schema)
+    response = _invoke(runnable, messages)
+    if is_truncated(response):
+        runnable = structured_runnable(_retry_with_more_output(llm_instance, what), schema)
+        response = _invoke(runnable, messages)
+        if is_truncated(response):
+            raise _truncated_failure(what)
+    text = response_text(response)
     try:
-        # Extract JSON from response
-        content = response.content
-        # Try to find JSON block
-        if "```json" in content:
-            json_start = content.find("```json") + 7
-            json_end = content.find("```", json_start)
-            content = content[json_start:json_end].strip()
-        elif "```" in content:
-            json_start = content.find("```") + 3
-            json_end = content.find("```", json_start)
-            content = content[json_start:json_end].strip()
-        
-        return json.loads(content)
-    except json.JSONDecodeError as e:
-        raise RuntimeError(f"Failed to parse architecture JSON: {e}\nResponse was: {response.content}")
+        return parse_structured(text, schema)
+    except StructuredOutputError as e:
+        print(f"🩹 The {what} did not match its schema, requesting a repair")
+        repair = _invoke(runnable, repair_messages(text, str(e), schema))
+        if is_truncated(repair):
+            raise _truncated_failure(what)
+        try:
+            return parse_structured(response_text(repair), schema)
+        except StructuredOutputError as repair_error:
+            raise _structured_failure(what, repair_error, text)
 
 
-def generate_implementation_plan(
+async def _generate_structured_async(llm_instance: BaseChatModel, messages: List[BaseMessage], schema, what: str) -> Dict:
+    """Async twin of _generate_structured"""
+    runnable = structured_runnable(llm_instance, schema)
+    response = await _ainvoke(runnable, messages)
+    if is_truncated(response):
+        runnable = structured_runnable(_retry_with_more_output(llm_instance, what), schema)
+        response = await _ainvoke(runnable, messages)
+        if is_truncated(response):
+            raise _truncated_failure(what)
+    text = response_text(response)
+    try:
+        return parse_structured(text, schema)
+    except StructuredOutputError as e:
+        print(f"🩹 The {what} did not match its schema, requesting a repair")
+        repair = await _ainvoke(runnable, repair_messages(text, str(e), schema))
+        if is_truncated(repair):
+            raise _truncated_failure(what)
+        try:
+            return parse_structured(response_text(repair), schema)
+        except StructuredOutputError as repair_error:
+            raise _structured_failure(what, repair_error, text)
+
+
+def generate_tech_stack_and_architecture(
     builder_prompt: str,
-    architecture: Dict,
     llm: Optional[BaseChatModel] = None,
-) -> List[Dict]:
+) -> Dict:
     """
-    Step 2: Generate a detailed implementation plan with phases
+    Step 1: Generate tech stack choice and high-level architecture
     """
+    # Schemas are imported on first use; pydantic is about half of the CLI's startup time
+    from schemas import Architecture
+    
+    llm_instance = llm or get_llm()
+    return _generate_structured(llm_instance, _architecture_messages(builder_prompt), Architecture, "architecture")
+
+
+async def generate_tech_stack_and_architecture_async(
+    builder_prompt: str,
+    llm: Optional[BaseChatModel] = None,
+) -> Dict:
+    """Async twin of generate_tech_stack_and_architecture"""
+    from schemas import Architecture
+    
+    llm_instance = llm or get_llm()
+    return await _generate_structured_async(
+        llm_instance, _architecture_messages(builder_prompt), Architecture, "architecture"
+    )
+
+
+def _implementation_plan_messages(
+    builder_prompt: str, architecture: Dict, previous_phases: Optional[List[Dict]] = None
+) -> List[BaseMessage]:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    
     system_prompt = """You are an expert software engineer who creates detailed, actionable implementation plans.
 
 Given a builder prompt and architecture, create a step-by-step implementation plan.
@@ -344,45 +650,74 @@ Respond in JSON format with this structure:
             "estimated_complexity": "low|medium|high"
         }
     ]
-}"""
+}
+
+Files marked "(written)" in the architecture's project_structure already have their complete content.
+Add "regenerate": true to such a file's entry only if that content must be rewritten."""
+
+    # File bodies in the project structure are written as they are; the plan only needs to know which
+    architecture_str = compact_json(architecture_outline(architecture))
+    previous_plan = ""
+    if previous_phases:
+        # Unchanged entries copied word for word keep their files out of an incremental rebuild
+        previous_plan = f"""Previous implementation plan, made before the builder prompt changed:
+
+{compact_json({"phases": previous_phases})}
 
-    architecture_str = json.dumps(architecture, indent=2)
-    messages = [
+Copy every file entry that is still needed exactly as it is (same path, purpose and dependencies, word for word). Only add, remove or change entries for what the builder prompt now asks differently.
+
+"""
+    return [
         SystemMessage(content=system_prompt),
-        HumanMessage(content=f"Builder Prompt:\n\n{builder_prompt}\n\nArchitecture:\n\n{architecture_str}\n\nGenerate the implementation plan.")
+        HumanMessage(content=f"Builder Prompt:\n\n{builder_prompt}\n\nArchitecture:\n\n{architecture_str}\n\n{previous_plan}Generate the implementation plan.")
     ]
+
+
+def generate_implementation_plan(
+    builder_prompt: str,
+    architecture: Dict,
+    llm: Optional[BaseChatModel] = None,
+    previous_phases: Optional[List[Dict]] = None,
+) -> List[Dict]:
+    """
+    Step 2: Generate a detailed implementation plan with phases
+    
+    With previous_phases (an incremental rebuild), the model is shown the
+    previous plan and asked to keep the entries that still apply unchanged.
+    """
+    from schemas import ImplementationPlan
     
     llm_instance = llm or get_llm()
-    response = llm_instance.invoke(messages)
-    try:
-        content = response.content
-        if "```json" in content:
-            json_start = content.find("```json") + 7
-            json_end = content.find("```", json_start)
-            content = content[json_start:json_end].strip()
-        elif "```" in content:
-            json_start = content.find("```") + 3
-            json_end = content.find("```", json_start)
-            content = content[json_start:json_end].strip()
-        
-        plan = json.loads(content)
-        return plan.get("phases", [])
-    except json.JSONDecodeError as e:
-        raise RuntimeError(f"Failed to parse implementation plan JSON: {e}\nResponse was: {response.content}")
+    messages = _implementation_plan_messages(builder_prompt, architecture, previous_phases)
+    return _generate_structured(llm_instance, messages, ImplementationPlan, "implementation plan")["phases"]
 
 
-def generate_file_content(
+async def generate_implementation_plan_async(
+    builder_prompt: str,
+    architecture: Dict,
+    llm: Optional[BaseChatModel] = None,
+    previous_phases: Optional[List[Dict]] = None,
+) -> List[Dict]:
+    """Async twin of generate_implementation_plan"""
+    from schemas import ImplementationPlan
+    
+    llm_instance = llm or get_llm()
+    messages = _implementation_plan_messages(builder_prompt, architecture, previous_phases)
+    plan = await _generate_structured_async(llm_instance, messages, ImplementationPlan, "implementation plan")
+    return plan["phases"]
+
+
+def _file_content_messages(
     builder_prompt: str,
     architecture: Dict,
     file_path: str,
     file_purpose: str,
     dependencies: List[str],
-    existing_files: Dict[str, str],
-    llm: Optional[BaseChatModel] = None,
-) -> str:
-    """
-    Step 3: Generate actual code for a specific file
-    """
+    existing_files: Mapping[str, str],
+    validation_error: Optional[str] = None,
+) -> List[BaseMessage]:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    
     system_prompt = """You are an expert software engineer writing production-quality code.
 
 You excel at:
@@ -401,67 +736,382 @@ Generate complete, runnable code for the requested file. Include:
 
 Return ONLY the code, no explanations or markdown formatting."""
 
-    architecture_str = json.dumps(architecture, indent=2)
-    dependencies_info = "\n".join([f"- {dep}: {existing_files.get(dep, 'Not yet created')[:200]}..." 
-                                   for dep in dependencies if dep in existing_files])
+    # Signatures of the dependencies rather than their first few hundred characters
+    dependencies_info = format_dependency_context(dependencies, existing_files, BUILD_DEPENDENCY_CONTEXT_TOKENS)
     
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"""Builder Prompt:
-{builder_prompt}
+    if validation_error is None:
+        request = f"Generate the complete code for {file_path}:"
+    else:
+        request = f"""The previous version of {file_path} failed a syntax check:
+{validation_error}
 
-Architecture:
-{architecture_str}
+Previous version:
+{existing_files.get(file_path, "")}
 
-File to generate:
+Fix the error and generate the complete corrected code for {file_path}:"""
+    
+    # Everything up to the per-file request is byte-identical across the files of a
+    # build, so providers with prompt caching bill it at the cached input rate
+    return [
+        SystemMessage(content=system_prompt),
+        _build_context_message(builder_prompt, architecture),
+        HumanMessage(content=f"""File to generate:
 - Path: {file_path}
 - Purpose: {file_purpose}
 - Dependencies: {', '.join(dependencies) if dependencies else 'None'}
 
-Existing files (for reference):
+Relevant modules and project structure around this file:
+{file_architecture_context(architecture, [file_path])}
+
+Interfaces of existing dependencies (for reference):
 {dependencies_info if dependencies_info else "No dependencies yet"}
 
-Generate the complete code for {file_path}:""")
+{request}""")
     ]
+
+
+def _build_context_message(builder_prompt: str, architecture: Dict) -> HumanMessage:
+    from langchain_core.messages import HumanMessage
     
-    llm_instance = llm or get_llm()
-    response = llm_instance.invoke(messages)
-    content = response.content
+    # Only the parts every file needs, so this prefix stays identical across files
+    architecture_str = compact_json(shared_architecture(architecture))
+    return HumanMessage(content=f"""Builder Prompt:
+{builder_prompt}
+
+Architecture:
+{architecture_str}""")
+
+
+def _mark_prompt_cache(llm_instance: BaseChatModel, messages: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Mark the static prefix of file messages as cacheable.
     
+    OpenAI caches long prompt prefixes automatically and Ollama reuses its KV
+    cache for them; Anthropic only caches up to a block marked with cache_control.
+    """
+    if llm_instance._llm_type != "anthropic-chat":
+        return messages
+    system_message, context_message, *rest = messages
+    marked = context_message.model_copy(update={"content": [
+        {"type": "text", "text": context_message.content, "cache_control": {"type": "ephemeral"}}
+    ]})
+    return [system_message, marked, *rest]
+
+
+def _strip_code_fence(content: str) -> str:
     # Clean up markdown code blocks if present
-    if "```" in content:
-        lines = content.split("\n")
-        # Remove first ``` line and language tag
-        if lines[0].strip().startswith("```"):
-            lines = lines[1:]
-        # Remove last ``` line
-        if lines and lines[-1].strip() == "```":
-            lines = lines[:-1]
-        content = "\n".join(lines)
+    fence_filter = CodeFenceFilter()
+    return fence_filter.feed(content) + fence_filter.finish()
+
+
+def _stream_response(
+    llm_instance: BaseChatModel, messages: List[BaseMessage], writer: StreamingFileWriter, **attributes
+) -> Optional[BaseMessage]:
+    """Stream one response's code into writer, or write it from the response cache"""
+    from llm_cache import lookup_response, store_response
     
-    return content.strip()
+    with trace_span("llm", "llm", model=_model_name(llm_instance), streamed=True, **attributes):
+        cached = lookup_response(llm_instance, messages)
+        if cached is not None:
+            writer.write(cached.content)
+            annotate_span(cached=True)
+            return cached
+        message = None
+        for chunk in llm_instance.stream(messages):
+            if message is None:
+                annotate_span(first_token=time.time())
+            writer.write(chunk_text(chunk))
+            message = chunk if message is None else message + chunk
+        if message is not None:
+            store_response(llm_instance, messages, message)
+            _trace_usage(message)
+        return message
 
 
-def build_prototype(
+async def _stream_response_async(
+    llm_instance: BaseChatModel, messages: List[BaseMessage], writer: StreamingFileWriter, **attributes
+) -> Optional[BaseMessage]:
+    """Async twin of _stream_response"""
+    from llm_cache import alookup_response, store_response
+    
+    with trace_span("llm", "llm", model=_model_name(llm_instance), streamed=True, **attributes):
+        cached = await alookup_response(llm_instance, messages)
+        if cached is not None:
+            writer.write(cached.content)
+            annotate_span(cached=True)
+            return cached
+        message = None
+        async for chunk in llm_instance.astream(messages):
+            if message is None:
+                annotate_span(first_token=time.time())
+            writer.write(chunk_text(chunk))
+            message = chunk if message is None else message + chunk
+        if message is not None:
+            store_response(llm_instance, messages, message)
+            _trace_usage(message)
+        return message
+
+
+def _continue_request(
+    messages: List[BaseMessage], writer: StreamingFileWriter, file_path: str, file_purpose: str, continuation: int
+) -> List[BaseMessage]:
+    """Messages asking for the rest of a file cut off at the output limit"""
+    if continuation > BUILD_MAX_CONTINUATIONS:
+        raise RuntimeError(
+            f"{file_path} was still cut off at the output limit after {BUILD_MAX_CONTINUATIONS} continuations"
+        )
+    print(f"✂️  {file_path} hit the output limit, continuing it ({continuation}/{BUILD_MAX_CONTINUATIONS})")
+    # Resume from the last complete line
+    writer.cut()
+    annotate_span(continuations=continuation)
+    return continuation_messages(messages, writer.text, file_path, file_purpose, BUILD_CONTINUATION_CONTEXT_TOKENS)
+
+
+def _generate_code(
+    llm_instance: BaseChatModel,
+    messages: List[BaseMessage],
+    writer: StreamingFileWriter,
+    file_path: str,
+    file_purpose: str,
+    stream: bool,
+) -> str:
+    """
+    Write a file's code to writer, continuing it while the model stops at its output limit
+    
+    Each continuation resends the original request with the end of the code so
+    far and is stitched on at the last complete line, so a long file costs
+    about one extra request per output limit it spans instead of a full
+    regeneration.
+    """
+    def respond(request: List[BaseMessage], **attributes) -> Optional[BaseMessage]:
+        if stream:
+            return _stream_response(llm_instance, request, writer, **attributes)
+        response = _invoke(llm_instance, request, **attributes)
+        writer.write(chunk_text(response))
+        return response
+    
+    try:
+        message = respond(messages)
+        continuation = 0
+        while is_truncated(message):
+            continuation += 1
+            request = _continue_request(messages, writer, file_path, file_purpose, continuation)
+            message = respond(request, continuation=continuation)
+        return writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+
+
+async def _generate_code_async(
+    llm_instance: BaseChatModel,
+    messages: List[BaseMessage],
+    writer: StreamingFileWriter,
+    file_path: str,
+    file_purpose: str,
+    stream: bool,
+) -> str:
+    """Async twin of _generate_code"""
+    async def respond(request: List[BaseMessage], **attributes) -> Optional[BaseMessage]:
+        if stream:
+            return await _stream_response_async(llm_instance, request, writer, **attributes)
+        response = await _ainvoke(llm_instance, request, **attributes)
+        writer.write(chunk_text(response))
+        return response
+    
+    try:
+        message = await respond(messages)
+        continuation = 0
+        while is_truncated(message):
+            continuation += 1
+            request = _continue_request(messages, writer, file_path, file_purpose, continuation)
+            message = await respond(request, continuation=continuation)
+        return writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+
+
+def generate_file_content(
     builder_prompt: str,
-    output_dir: str = BUILD_OUTPUT_DIR,
-    provider: Optional[Literal["openai", "anthropic", "ollama"]] = None,
-    model: Optional[str] = None,
-) -> Path:
+    architecture: Dict,
+    file_path: str,
+    file_purpose: str,
+    dependencies: List[str],
+    existing_files: Mapping[str, str],
+    llm: Optional[BaseChatModel] = None,
+    write_to: Optional[Path] = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    validation_error: Optional[str] = None,
+) -> str:
     """
-    Main function: Build the prototype step by step
+    Step 3: Generate actual code for a specific file
     
-    Args:
-        builder_prompt: The builder prompt from MVP Planner Agent
-        output_dir: Directory to output the prototype
-        provider: LLM provider ("openai", "anthropic", or "ollama")
-        model: Model name for the provider
+    If write_to or on_chunk is given, the response is streamed instead: code
+    (with any markdown fence stripped) is written to a temp file next to
+    write_to as it arrives and renamed into place once complete, and
+    on_chunk(text) is called with each new piece.
+    
+    A response cut off at the model's output limit is continued from its last
+    complete line, up to BUILD_MAX_CONTINUATIONS times.
+    
+    With validation_error, the file is regenerated from its previous version in
+    existing_files and the syntax error it failed with.
+    """
+    messages = _file_content_messages(
+        builder_prompt, architecture, file_path, file_purpose, dependencies, existing_files, validation_error
+    )
+    llm_instance = llm or get_llm()
+    messages = _mark_prompt_cache(llm_instance, messages)
+    if write_to is not None or on_chunk is not None:
+        # Each attempt streams into a fresh temp file; responses it already got come from the cache
+        return call_with_retry(
+            lambda: _generate_code(
+                llm_instance, messages, StreamingFileWriter(write_to, on_chunk), file_path, file_purpose, stream=True
+            ),
+            BUILD_LLM_ATTEMPTS, BUILD_RETRY_BASE_DELAY, BUILD_RETRY_MAX_DELAY, on_retry=count_retry,
+        )
+    return _generate_code(llm_instance, messages, StreamingFileWriter(), file_path, file_purpose, stream=False)
+
+
+async def generate_file_content_async(
+    builder_prompt: str,
+    architecture: Dict,
+    file_path: str,
+    file_purpose: str,
+    dependencies: List[str],
+    existing_files: Mapping[str, str],
+    llm: Optional[BaseChatModel] = None,
+    write_to: Optional[Path] = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    validation_error: Optional[str] = None,
+) -> str:
+    """Async twin of generate_file_content"""
+    messages = _file_content_messages(
+        builder_prompt, architecture, file_path, file_purpose, dependencies, existing_files, validation_error
+    )
+    llm_instance = llm or get_llm()
+    messages = _mark_prompt_cache(llm_instance, messages)
+    if write_to is not None or on_chunk is not None:
+        return await acall_with_retry(
+            lambda: _generate_code_async(
+                llm_instance, messages, StreamingFileWriter(write_to, on_chunk), file_path, file_purpose, stream=True
+            ),
+            BUILD_LLM_ATTEMPTS, BUILD_RETRY_BASE_DELAY, BUILD_RETRY_MAX_DELAY, on_retry=count_retry,
+        )
+    return await _generate_code_async(
+        llm_instance, messages, StreamingFileWriter(), file_path, file_purpose, stream=False
+    )
+
+
+# Opening of a file's content in a batch response
+_CONTENT_KEY = re.compile(r'"content"\s*:\s*"')
+
+
+def _file_batch_messages(
+    builder_prompt: str,
+    architecture: Dict,
+    files: List[Dict],
+    existing_files: Mapping[str, str],
+) -> List[BaseMessage]:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    
+    system_prompt = """You are an expert software engineer writing production-quality code.
+
+Generate several small project files in one response: package markers, configuration,
+constants, re-exports and similar. Each file must be complete and follow the
+conventions of the chosen tech stack.
+
+Return ONLY a JSON object, no explanations or markdown formatting:
+{"files": [{"path": "path/as/given", "content": "complete file content"}]}
+Include every requested file exactly once, with its path exactly as given."""
+
+    files_info = "\n".join(f"- {info['path']}: {info.get('purpose', '')}" for info in files)
+    dependencies = list(dict.fromkeys(dep for info in files for dep in info["dependencies"]))
+    dependencies_info = format_dependency_context(dependencies, existing_files, BUILD_DEPENDENCY_CONTEXT_TOKENS)
+    
+    return [
+        SystemMessage(content=system_prompt),
+        _build_context_message(builder_prompt, architecture),
+        HumanMessage(content=f"""Files to generate:
+{files_info}
+
+Relevant modules and project structure around these files:
+{file_architecture_context(architecture, [info['path'] for info in files])}
+
+Interfaces of existing dependencies (for reference):
+{dependencies_info if dependencies_info else "No dependencies yet"}
+
+Generate the complete content of all {len(files)} files:""")
+    ]
+
+
+def _cut_off(content: str, path: str) -> bool:
+    """Whether a batch response cut off at the output limit stops inside this file's content"""
+    start = content.rfind(json.dumps(path))
+    opening = _CONTENT_KEY.search(content, max(start, 0))
+    if start < 0 or opening is None:
+        return True
+    try:
+        json.JSONDecoder().raw_decode(content, opening.end() - 1)
+    except json.JSONDecodeError:
+        return True
+    return False
+
+
+def _parse_file_batch(content: str, paths: List[str], truncated: bool = False) -> Dict[str, str]:
+    try:
+        data = loads_lenient(content)
+    except json.JSONDecodeError as e:
+        raise RuntimeError(f"Failed to parse batched files JSON: {e}\nResponse was: {content}")
+    
+    entries = data.get("files", []) if isinstance(data, dict) else data
+    last = entries[-1] if entries else None
+    if truncated and isinstance(last, dict) and _cut_off(content, str(last.get("path", ""))):
+        # The file the response stopped in is generated on its own
+        entries = entries[:-1]
+    return {
+        entry["path"]: _strip_code_fence(str(entry.get("content", "")))
+        for entry in entries
+        if isinstance(entry, dict) and entry.get("path") in paths
+    }
+
+
+def generate_file_batch(
+    builder_prompt: str,
+    architecture: Dict,
+    files: List[Dict],
+    existing_files: Mapping[str, str],
+    llm: Optional[BaseChatModel] = None,
+) -> Dict[str, str]:
     """
-    # Initialize LLM with specified provider/model
-    llm_instance = get_llm(provider, model)
-    provider_name = provider or DEFAULT_PROVIDER
-    model_name = model or DEFAULT_MODEL
+    Step 3 for several small files at once: one call returning a JSON list of files
     
+    Returns:
+        {path: content} for the requested files found in the response; files the
+        model left out are missing from the dict
+    """
+    llm_instance = llm or get_llm()
+    messages = _mark_prompt_cache(llm_instance, _file_batch_messages(builder_prompt, architecture, files, existing_files))
+    response = _invoke(llm_instance, messages)
+    return _parse_file_batch(response.content, [info["path"] for info in files], is_truncated(response))
+
+
+async def generate_file_batch_async(
+    builder_prompt: str,
+    architecture: Dict,
+    files: List[Dict],
+    existing_files: Mapping[str, str],
+    llm: Optional[BaseChatModel] = None,
+) -> Dict[str, str]:
+    """Async twin of generate_file_batch"""
+    llm_instance = llm or get_llm()
+    messages = _mark_prompt_cache(llm_instance, _file_batch_messages(builder_prompt, architecture, files, existing_files))
+    response = await _ainvoke(llm_instance, messages)
+    return _parse_file_batch(response.content, [info["path"] for info in files], is_truncated(response))
+
+
+def _start_build(output_dir: str, provider_name: str, model_name: str) -> Path:
     print(f"\n{'='*60}")
     print("🚀 MVP Builder Agent - Step-by-Step Prototype Generation")
     print(f"🤖 Using: {provider_name.upper()} - {model_name}")
@@ -469,104 +1119,864 @@ def build_prototype(
     
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
-    
-    # Step 1: Generate tech stack and architecture
-    print("📐 Step 1: Generating tech stack and architecture...")
-    architecture = generate_tech_stack_and_architecture(builder_prompt, llm_instance)
+    return output_path
+
+
+def _check_precomputed_plan(architecture: Optional[Dict], phases: Optional[List[Dict]]) -> None:
+    if phases is not None and architecture is None:
+        raise ValueError("phases were planned from an architecture; pass that architecture too")
+
+
+def _reuse_step(manifest: BuildManifest, step: str, label: str) -> Optional[str]:
+    content = manifest.load_step(step)
+    if content is not None:
+        print(f"⏭️  Reusing {label} from the previous build")
+    return content
+
+
+def _save_architecture(output_path: Path, architecture: Dict, manifest: BuildManifest) -> None:
     print(f"✅ Tech Stack: {architecture['tech_stack'].get('frontend', 'N/A')} + {architecture['tech_stack'].get('backend', 'N/A')}")
     
-    # Save architecture plan
     arch_file = output_path / "architecture.json"
-    arch_file.write_text(json.dumps(architecture, indent=2), encoding="utf-8")
+    arch_text = json.dumps(architecture, indent=2)
+    arch_file.write_text(arch_text, encoding="utf-8")
+    manifest.mark_step("architecture", arch_file.name, arch_text)
     print(f"💾 Architecture saved to: {arch_file}\n")
-    
-    # Step 2: Generate implementation plan
-    print("📋 Step 2: Generating implementation plan...")
-    phases = generate_implementation_plan(builder_prompt, architecture, llm_instance)
+
+
+def _save_implementation_plan(output_path: Path, phases: List[Dict], manifest: BuildManifest) -> None:
     print(f"✅ Created {len(phases)} implementation phases\n")
     
-    # Save implementation plan
     plan_file = output_path / "implementation_plan.json"
-    plan_file.write_text(json.dumps({"phases": phases}, indent=2), encoding="utf-8")
+    plan_text = json.dumps({"phases": phases}, indent=2)
+    plan_file.write_text(plan_text, encoding="utf-8")
+    manifest.mark_step("plan", plan_file.name, plan_text)
     print(f"💾 Implementation plan saved to: {plan_file}\n")
+
+
+def _load_built_files(manifest: BuildManifest, file_graph: Dict[str, Dict]) -> GeneratedFileStore:
+    """
+    Store of the build's generated files, starting with those a previous run
+    already generated and that are still intact on disk
+    """
+    existing_files = GeneratedFileStore(manifest.output_path, int(BUILD_FILE_CACHE_MB * 1024 * 1024))
+    for file_path in file_graph:
+        content = manifest.load_file(file_path)
+        if content is not None:
+            existing_files[file_path] = content
+    if existing_files:
+        print(f"⏭️  Reusing {len(existing_files)}/{len(file_graph)} files from the previous build\n")
+    return existing_files
+
+
+def _seed_from_structure(
+    output_path: Path,
+    architecture: Dict,
+    file_graph: Dict[str, Dict],
+    existing_files: MutableMapping[str, str],
+    manifest: BuildManifest,
+) -> List[str]:
+    """
+    Write the files whose content the architecture already returned, so they
+    aren't generated again; planned ones are recorded as built.
     
-    # Step 3: Generate files phase by phase
-    existing_files = {}
-    total_files = sum(len(phase.get("files_to_create", [])) for phase in phases)
-    current_file = 0
+    Returns:
+        Planned files written from the project structure
+    """
+    structure = architecture.get("project_structure") or {}
+    contents = structure_files(seed_structure(structure, file_graph, existing_files))
+    if not contents:
+        return []
+    # Files already on disk (an earlier run wrote them) are never rewritten; ones edited since are kept as they are
+    on_disk = {path: _read_current(output_path / path) for path in contents if (output_path / path).is_file()}
+    edited = [path for path, current in on_disk.items() if current != contents[path]]
+    with trace_span("seed", "step") as span:
+        seed = seed_structure(structure, file_graph, existing_files, kept=on_disk)
+        create_project_structure(output_path, seed)
+        written = structure_files(seed)
+        seeded = [path for path in contents if path in file_graph and path not in edited]
+        for file_path in seeded:
+            existing_files[file_path] = contents[file_path]
+            manifest.mark_file(file_path, contents[file_path])
+        span["files"] = len(written)
+    if written:
+        print(f"🌱 Wrote {len(written)} files from the architecture's project structure\n")
+    for file_path in edited:
+        print(f"⚠️  Keeping {file_path}: edited since the architecture's project structure wrote it")
+    return seeded
+
+
+def _read_current(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _load_previous_build(output_path: Path) -> Optional[tuple]:
+    """Architecture and plan phases of the build already in output_path, read before they are overwritten"""
+    plan_file = output_path / "implementation_plan.json"
+    if not plan_file.exists():
+        print("⚠️  No previous implementation_plan.json, building every file\n")
+        return None
+    arch_file = output_path / "architecture.json"
+    previous_architecture = json.loads(arch_file.read_text(encoding="utf-8")) if arch_file.exists() else None
+    previous_phases = json.loads(plan_file.read_text(encoding="utf-8")).get("phases", [])
+    return previous_architecture, previous_phases
+
+
+def _apply_plan_diff(
+    output_path: Path,
+    manifest: BuildManifest,
+    previous_architecture: Optional[Dict],
+    previous_phases: List[Dict],
+    architecture: Dict,
+    file_graph: Dict[str, Dict],
+) -> None:
+    """Queue files the new plan changed (and their dependents) for rebuilding and delete removed ones"""
+    previous_graph = build_file_graph(previous_phases)
+    diff = diff_file_graphs(previous_graph, file_graph)
+    # The justification is reworded whenever the architecture is regenerated; only the stack itself counts
+    stack = shared_architecture(architecture)["tech_stack"]
+    if previous_architecture is not None and shared_architecture(previous_architecture)["tech_stack"] != stack:
+        print("🔁 Tech stack changed, rebuilding every file")
+        rebuild = set(file_graph)
+    else:
+        rebuild = files_to_rebuild(previous_graph, file_graph, diff)
     
+    for file_path in diff["removed"]:
+        full_path = output_path / file_path
+        if manifest.load_file(file_path) is not None:
+            full_path.unlink()
+        elif full_path.exists():
+            print(f"⚠️  Keeping {file_path}: removed from the plan but edited since it was generated")
+    manifest.forget_files(diff["removed"])
+    manifest.invalidate_files(rebuild)
+    print(
+        f"🔁 Plan changes: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+        f"{len(diff['changed'])} changed; rebuilding {len(rebuild)}/{len(file_graph)} files\n"
+    )
+
+
+def _print_files_step(phases: List[Dict], architecture: Dict, pending_graph: Dict[str, Dict], max_workers: int) -> None:
+    print(f"{'='*60}")
+    print(f"🔨 Step 3: Generating {len(pending_graph)} files ({max_workers} in parallel)")
     for phase in phases:
         phase_num = phase.get("phase_number", 0)
-        phase_name = phase.get("name", f"Phase {phase_num}")
-        files_to_create = phase.get("files_to_create", [])
-        
-        print(f"{'='*60}")
-        print(f"🔨 Phase {phase_num}: {phase_name}")
-        print(f"   {phase.get('description', '')}")
-        print(f"{'='*60}\n")
-        
-        for file_info in files_to_create:
-            current_file += 1
-            file_path = file_info.get("path", "")
-            file_purpose = file_info.get("purpose", "")
-            dependencies = file_info.get("dependencies", [])
-            
-            if not file_path:
-                continue
-            
-            print(f"[{current_file}/{total_files}] Generating: {file_path}")
-            
-            try:
-                content = generate_file_content(
-                    builder_prompt,
-                    architecture,
-                    file_path,
-                    file_purpose,
-                    dependencies,
-                    existing_files,
-                    llm_instance,
-                )
-                
-                # Write file
-                full_path = output_path / file_path
-                full_path.parent.mkdir(parents=True, exist_ok=True)
-                full_path.write_text(content, encoding="utf-8")
-                
-                # Store for future dependencies
-                existing_files[file_path] = content
-                print(f"   ✅ Created: {full_path}\n")
-                
-            except Exception as e:
-                print(f"   ❌ Error generating {file_path}: {e}\n")
-                # Continue with other files
-                continue
+        print(f"   Phase {phase_num}: {phase.get('name', f'Phase {phase_num}')}")
+    if pending_graph:
+        tokens = context_token_savings(architecture, list(pending_graph))
+        print(
+            f"   Architecture context per file: ~{tokens['before']:,} tokens as indented JSON -> "
+            f"~{tokens['shared'] + tokens['per_file']:,} pruned ({tokens['shared']:,} shared + ~{tokens['per_file']:,} per file)"
+        )
+    print(f"{'='*60}\n")
+
+
+def _write_generated_file(
+    output_path: Path,
+    file_path: str,
+    content: str,
+    existing_files: MutableMapping[str, str],
+    streamed: bool = False,
+) -> Path:
+    full_path = output_path / file_path
+    with trace_span(file_path, "write", bytes=len(content.encode("utf-8")), streamed=streamed):
+        if not streamed:
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            full_path.write_text(content, encoding="utf-8")
     
-    # Step 4: Generate README and setup instructions
-    print(f"{'='*60}")
+    # Store for future dependencies
+    existing_files[file_path] = content
+    return full_path
+
+
+def _batch_graph(pending_graph: Dict[str, Dict], batch_small_files: bool, templated: List[str]) -> Dict[str, Dict]:
+    """The pending files to schedule, with small files of a phase folded into batch nodes"""
+    if not batch_small_files:
+        return pending_graph
+    # Files a template renders don't need a share of an LLM call
+    batches = [
+        batch for batch in (
+            [path for path in batch if path not in templated]
+            for batch in group_small_files(pending_graph, BUILD_BATCH_MAX_FILES)
+        )
+        if len(batch) > 1
+    ]
+    if batches:
+        batched = sum(len(batch) for batch in batches)
+        print(f"📦 Batching {batched} small files into {len(batches)} calls\n")
+    return collapse_batches(pending_graph, batches)
+
+
+def _write_generated_batch(
+    output_path: Path,
+    contents: Dict[str, str],
+    existing_files: MutableMapping[str, str],
+    on_chunk: Optional[Callable[[str, str], None]],
+) -> Dict[str, Path]:
+    written = {}
+    for file_path, content in contents.items():
+        written[file_path] = _write_generated_file(output_path, file_path, content, existing_files)
+        if on_chunk is not None:
+            on_chunk(file_path, content)
+    return written
+
+
+def _templated_files(templates: Optional[TemplateLibrary], pending_graph: Dict[str, Dict], context: Dict) -> List[str]:
+    """Pending files a template may render without an LLM call"""
+    if templates is None:
+        return []
+    templated = [path for path in pending_graph if templates.can_render(path, context["stacks"])]
+    if templated:
+        print(f"🧩 {len(templated)} boilerplate files match templates and skip the LLM unless a template declines\n")
+    return templated
+
+
+def _render_template(
+    templates: Optional[TemplateLibrary], file_info: Dict, context: Dict, existing_files: Mapping[str, str]
+) -> Optional[str]:
+    # A file that failed the syntax check is repaired by the LLM, not rendered again
+    if templates is None or "validation_error" in file_info:
+        return None
+    return templates.render(file_info, context, existing_files)
+
+
+def _file_results(graph: Dict[str, Dict], node: str, result, error: Optional[BaseException]) -> List[tuple]:
+    """(file_path, full_path, error) for each file a finished graph node generated"""
+    members = graph[node].get("batch")
+    if members is None:
+        return [(node, result, error)]
+    return [(file_path, None if error else result[file_path], error) for file_path in members]
+
+
+def _retry_graph(file_graph: Dict[str, Dict], failed: List[str], retry_round: int) -> Dict[str, Dict]:
+    """Failed files queued for another attempt once the rest of the build is done"""
+    print(f"\n🔁 Retry round {retry_round}: regenerating {len(failed)} files that failed\n")
+    return select_files(file_graph, failed)
+
+
+def _validate_generated(output_path: Path, existing_files: Mapping[str, str], paths: List[str]) -> Dict[str, str]:
+    """Syntax-check generated files in parallel, printing any that fail"""
+    files = [path for path in paths if path in existing_files]
+    with trace_span("validate", "step", files=len(files)) as span:
+        broken = validate_files(output_path, files)
+        span["broken"] = len(broken)
+    if broken:
+        print(f"\n⚠️  {len(broken)} of {len(files)} files failed the syntax check:")
+        for file_path, error in broken.items():
+            print(f"   - {file_path}: {error}")
+    else:
+        print(f"\n🔎 Syntax check passed for {len(files)} files")
+    return broken
+
+
+def _repair_graph(file_graph: Dict[str, Dict], broken: Dict[str, str], repair_round: int) -> Dict[str, Dict]:
+    """Files that failed the syntax check, each carrying its error for the regeneration prompt"""
+    print(f"\n🛠️  Repair round {repair_round}: regenerating {len(broken)} files with their syntax errors\n")
+    return {path: {**file_graph[path], "validation_error": broken[path]} for path in select_files(file_graph, broken)}
+
+
+def _record_file_result(
+    manifest: BuildManifest,
+    existing_files: Mapping[str, str],
+    current_file: int,
+    total_files: int,
+    file_info: Dict,
+    file_path: str,
+    full_path: Optional[Path],
+    error: Optional[BaseException],
+) -> None:
+    if error is None:
+        manifest.mark_file(file_path, existing_files[file_path])
+        print(f"[{current_file}/{total_files}] ✅ Created (Phase {file_info['phase_number']}): {full_path}")
+    else:
+        # Continue with other files; a resumed build retries this one
+        manifest.mark_file(file_path, error=error)
+        print(f"[{current_file}/{total_files}] ❌ Error generating {file_path}: {error}")
+
+
+def _print_readme_step() -> None:
+    print(f"\n{'='*60}")
     print("📝 Step 4: Generating README and setup instructions...")
     print(f"{'='*60}\n")
+
+
+def _track_usage(llm_instance: BaseChatModel, ledger: BuildLedger) -> BaseChatModel:
+    """Copy of the model that reports every call to this build's ledger (the client is shared)"""
+    return llm_instance.model_copy(update={"callbacks": [*(llm_instance.callbacks or []), ledger]})
+
+
+def _tier_models(provider: str, model: str) -> Dict[str, tuple]:
+    """(provider, model) for the fast and standard tiers, never pricier than the build's model"""
+    overrides = {"fast": BUILD_FAST_MODEL, "standard": BUILD_STANDARD_MODEL}
+    flagship_price = MODEL_PRICING.get(model, {}).get("output")
+    tiers = {}
+    for tier, override in overrides.items():
+        if override:
+            # Ollama tags contain colons ("qwen2.5-coder:7b"); only a known provider is a prefix
+            prefix, _, rest = override.partition(":")
+            tier_provider, tier_model = (prefix, rest) if prefix in AVAILABLE_MODELS else (provider, override)
+        elif tier in MODEL_TIERS.get(provider, {}):
+            tier_provider, tier_model = provider, MODEL_TIERS[provider][tier]
+        else:
+            continue
+        tier_price = MODEL_PRICING.get(tier_model, {}).get("output")
+        if flagship_price is not None and tier_price is not None and tier_price > flagship_price:
+            tier_model, tier_provider = model, provider
+        tiers[tier] = (tier_provider, tier_model)
+    return tiers
+
+
+def _model_router(
+    llm_instance: BaseChatModel,
+    provider: str,
+    model: str,
+    route_models: bool,
+    cache: Optional[BaseCache],
+    ledger: BuildLedger,
+) -> ModelRouter:
+    def create_tier_llm(tier_provider: str, tier_model: str) -> BaseChatModel:
+        # An Ollama model that was never pulled only fails at its first call; fall back before that
+        if (
+            tier_provider == "ollama" and not getattr(cache, "offline", False)
+            and ollama_has_model(OLLAMA_BASE_URL, tier_model) is False
+        ):
+            raise RuntimeError(f"model not pulled (ollama pull {tier_model})")
+        tier_llm = get_llm(tier_provider, tier_model, cache=cache)
+        return _track_usage(tier_llm, ledger)
+    
+    tier_models = _tier_models(provider, model) if route_models else {}
+    router = ModelRouter(llm_instance, (provider, model), tier_models, create_tier_llm)
+    if router.enabled:
+        tiers = ", ".join(f"{tier}={tier_provider}/{tier_model}" for tier, (tier_provider, tier_model) in tier_models.items())
+        print(f"🧭 Routing steps by complexity: flagship={provider}/{model}, {tiers}\n")
+    return router
+
+
+def _print_budget_stop(ledger: BuildLedger) -> None:
+    print(f"\n💸 Budget reached after {ledger.summary()}")
+    print("   No further LLM calls will be started for this build.")
+
+
+def _finish_build(
+    output_path: Path,
+    readme_content: Optional[str],
+    existing_files: Mapping[str, str],
+    total_files: int,
+    manifest: BuildManifest,
+    ledger: BuildLedger,
+    tracer: BuildTracer,
+    templated_files: int,
+    seeded_files: int,
+) -> None:
+    if readme_content is not None:
+        readme_path = output_path / "README.md"
+        readme_path.write_text(readme_content, encoding="utf-8")
+        manifest.mark_step("readme", readme_path.name, readme_content)
+        print(f"✅ README created: {readme_path}\n")
     
-    readme_content = generate_readme(builder_prompt, architecture, phases, llm_instance)
-    readme_path = output_path / "README.md"
-    readme_path.write_text(readme_content, encoding="utf-8")
-    print(f"✅ README created: {readme_path}\n")
+    ledger.save()
+    tracer.finish(
+        files=len(existing_files), planned_files=total_files, templated_files=templated_files,
+        seeded_files=seeded_files, tokens=ledger.total_tokens,
+    )
     
     print(f"{'='*60}")
     print(f"🎉 Prototype generation complete!")
     print(f"📁 Output directory: {output_path.absolute()}")
     print(f"📊 Total files created: {len(existing_files)}")
+    print(f"💰 LLM usage: {ledger.summary()} (see {ledger.path.name})")
+    for line in ledger.tier_summary():
+        print(f"   {line}")
+    if seeded_files:
+        print(f"🌱 Project structure: {seeded_files} files written from the architecture, {seeded_files} LLM calls skipped")
+    if templated_files:
+        print(f"🧩 Templates: {templated_files} boilerplate files rendered, {templated_files} LLM calls skipped")
+    print(f"⏱️  Trace: {tracer.path.name} (python trace_report.py {output_path} for the critical path)")
+    if len(existing_files) < total_files or readme_content is None:
+        print(f"⚠️  {total_files - len(existing_files)} planned files not generated; resume the build to finish them")
     print(f"{'='*60}\n")
+
+
+class _FilesProgress:
+    """Files of one pass over a file graph as they finish: printed, checkpointed and the failures kept"""
     
-    return output_path
+    def __init__(self, run: "_BuildRun", graph: Dict[str, Dict], total_files: int) -> None:
+        self._run = run
+        self._graph = graph
+        self._total_files = total_files
+        self._current_file = 0
+        self.failed: List[str] = []
+    
+    def record(self, node: str, result, error: Optional[BaseException]) -> None:
+        for file_path, full_path, file_error in _file_results(self._graph, node, result, error):
+            self._current_file += 1
+            _record_file_result(
+                self._run.manifest, self._run.existing_files, self._current_file, self._total_files,
+                self._run.file_graph[file_path], file_path, full_path, file_error,
+            )
+            if file_error is not None:
+                self.failed.append(file_path)
 
 
-def generate_readme(
+class _BuildRun:
+    """
+    State and steps of one build, shared by build_prototype and its async twin
+    
+    The twins only make the LLM calls and drive the scheduler; setup, reuse
+    of earlier steps, writing and checkpointing files, and the summary live here.
+    """
+    
+    def __init__(
+        self,
+        builder_prompt: str,
+        output_dir: str,
+        provider: Optional[str],
+        model: Optional[str],
+        use_cache: bool,
+        resume: bool,
+        incremental: bool,
+        architecture: Optional[Dict],
+        phases: Optional[List[Dict]],
+        stream: bool,
+        on_chunk: Optional[Callable[[str, str], None]],
+        max_cost: Optional[float],
+        max_tokens: Optional[int],
+        route_models: bool,
+        cassette: Optional[LLMCassette],
+    ) -> None:
+        from ledger import LEDGER_FILENAME, BuildLedger
+        
+        _check_precomputed_plan(architecture, phases)
+        provider_name, model_name = provider or DEFAULT_PROVIDER, model or DEFAULT_MODEL
+        
+        # Initialize LLM with specified provider/model
+        cache = _build_cache(use_cache, cassette)
+        llm_instance = get_llm(provider, model, cache=cache)
+        self.builder_prompt = builder_prompt
+        self.output_path = _start_build(output_dir, provider_name, model_name)
+        self.manifest = BuildManifest.open(self.output_path, builder_prompt, resume, incremental)
+        self.previous_build = _load_previous_build(self.output_path) if incremental else None
+        self.ledger = BuildLedger(self.output_path / LEDGER_FILENAME, MODEL_PRICING, max_cost, max_tokens, resume)
+        self.tracer = BuildTracer(
+            self.output_path / TRACE_FILENAME, provider=provider_name, model=model_name,
+            cassette=cassette.mode if cassette is not None else None,
+        )
+        self.tracer.activate()
+        self.router = _model_router(
+            _track_usage(llm_instance, self.ledger), provider_name, model_name, route_models, cache, self.ledger
+        )
+        self.architecture = architecture
+        self.phases = phases
+        self.stream = stream or on_chunk is not None
+        self.on_chunk = on_chunk
+        self.readme_content: Optional[str] = None
+        # Files rendered from a template instead of generated
+        self.rendered: List[str] = []
+    
+    @property
+    def previous_phases(self) -> Optional[List[Dict]]:
+        return self.previous_build[1] if self.previous_build else None
+    
+    @contextmanager
+    def llm_step(self, step: str, label: str) -> Iterator[BaseChatModel]:
+        """Trace one of the build's own steps and label its LLM calls, yielding the model for it"""
+        from ledger import ledger_label
+        
+        tier = self.router.tier_for_step(step)
+        with trace_span(step, "step"), ledger_label(label, tier):
+            yield self.router.llm_for(tier)
+    
+    def needs_architecture(self) -> bool:
+        """Step 1 with the provided or saved architecture; whether it still has to be generated"""
+        if self.architecture is not None:
+            print("📐 Step 1: Using the provided tech stack and architecture")
+            _save_architecture(self.output_path, self.architecture, self.manifest)
+        elif (arch_text := _reuse_step(self.manifest, "architecture", "architecture.json")) is not None:
+            self.architecture = json.loads(arch_text)
+        else:
+            print("📐 Step 1: Generating tech stack and architecture...")
+            return True
+        return False
+    
+    def save_architecture(self, architecture: Dict) -> None:
+        self.architecture = architecture
+        _save_architecture(self.output_path, architecture, self.manifest)
+    
+    def needs_plan(self) -> bool:
+        """Step 2 with the provided or saved plan; whether it still has to be generated"""
+        if self.phases is not None:
+            print("📋 Step 2: Using the provided implementation plan")
+            _save_implementation_plan(self.output_path, self.phases, self.manifest)
+        elif (plan_text := _reuse_step(self.manifest, "plan", "implementation_plan.json")) is not None:
+            self.phases = json.loads(plan_text).get("phases", [])
+        else:
+            print("📋 Step 2: Generating implementation plan...")
+            return True
+        return False
+    
+    def save_plan(self, phases: List[Dict]) -> None:
+        self.phases = phases
+        _save_implementation_plan(self.output_path, phases, self.manifest)
+    
+    def prepare_files(self, max_workers: int, use_templates: bool, batch_small_files: bool) -> Dict[str, Dict]:
+        """
+        Step 3 setup: apply plan changes, reuse built files, seed the project
+        structure and find the files templates render
+        
+        Returns:
+            Graph of the pending files to schedule, small files folded into batches
+        """
+        self.file_graph = build_file_graph(self.phases)
+        if self.previous_build is not None:
+            _apply_plan_diff(self.output_path, self.manifest, *self.previous_build, self.architecture, self.file_graph)
+        self.existing_files = _load_built_files(self.manifest, self.file_graph)
+        self.seeded = _seed_from_structure(
+            self.output_path, self.architecture, self.file_graph, self.existing_files, self.manifest
+        )
+        self.pending_graph = select_files(
+            self.file_graph, [path for path in self.file_graph if path not in self.existing_files]
+        )
+        self.manifest.mark_pending(self.pending_graph)
+        _print_files_step(self.phases, self.architecture, self.pending_graph, max_workers)
+        self.templates = get_template_library() if use_templates else None
+        self.templates_context = template_context(self.architecture, self.file_graph, self.output_path.name)
+        templated = _templated_files(self.templates, self.pending_graph, self.templates_context)
+        return _batch_graph(self.pending_graph, batch_small_files, templated)
+    
+    @contextmanager
+    def file_label(self, file_path: str, file_info: Dict) -> Iterator[BaseChatModel]:
+        """Label the block's LLM calls with the file (or batch), yielding the model for its tier"""
+        from ledger import ledger_label
+        
+        tier = self.router.tier_for_file(file_info)
+        with ledger_label(", ".join(file_info["batch"]) if "batch" in file_info else file_path, tier):
+            yield self.router.llm_for(tier)
+    
+    @contextmanager
+    def file_step(self, file_path: str, file_info: Dict) -> Iterator[BaseChatModel]:
+        """Trace one scheduled file or batch and label its LLM calls, yielding the model for it"""
+        tier = self.router.tier_for_file(file_info)
+        if "batch" in file_info:
+            span = trace_span(
+                file_path, "batch", files=file_info["batch"], phase=file_info["phase_number"], tier=tier,
+                dependencies=file_info["dependencies"],
+            )
+        else:
+            span = trace_span(
+                file_path, "file", phase=file_info["phase_number"], tier=tier, dependencies=file_info["dependencies"],
+                repair=file_info.get("validation_error") is not None,
+            )
+        with span, self.file_label(file_path, file_info) as llm_instance:
+            yield llm_instance
+    
+    def file_request(self, file_info: Dict, llm_instance: BaseChatModel, stream: bool = True) -> Dict:
+        """Arguments of generate_file_content for a file; stream=False for a file left out of a batch"""
+        file_path = file_info["path"]
+        request = {
+            "builder_prompt": self.builder_prompt,
+            "architecture": self.architecture,
+            "file_path": file_path,
+            "file_purpose": file_info.get("purpose", ""),
+            "dependencies": file_info["dependencies"],
+            "existing_files": self.existing_files,
+            "llm": llm_instance,
+        }
+        if stream:
+            request.update(
+                write_to=self.output_path / file_path if self.stream else None,
+                on_chunk=partial(self.on_chunk, file_path) if self.on_chunk else None,
+                validation_error=file_info.get("validation_error"),
+            )
+        return request
+    
+    def batch_request(self, file_info: Dict, llm_instance: BaseChatModel) -> Dict:
+        """Arguments of generate_file_batch for a batch node"""
+        return {
+            "builder_prompt": self.builder_prompt,
+            "architecture": self.architecture,
+            "files": [self.file_graph[path] for path in file_info["batch"]],
+            "existing_files": self.existing_files,
+            "llm": llm_instance,
+        }
+    
+    def left_out(self, file_info: Dict, contents: Mapping[str, str]) -> List[Dict]:
+        """Files of a batch its response left out, to generate on their own"""
+        return [self.file_graph[path] for path in file_info["batch"] if path not in contents]
+    
+    def render_template(self, file_path: str, file_info: Dict) -> Optional[Path]:
+        """Write the file from a template if one renders it, without an LLM call"""
+        content = _render_template(self.templates, file_info, self.templates_context, self.existing_files)
+        if content is None:
+            return None
+        annotate_span(template=True)
+        self.rendered.append(file_path)
+        if self.on_chunk is not None:
+            self.on_chunk(file_path, content)
+        return _write_generated_file(self.output_path, file_path, content, self.existing_files)
+    
+    def write_file(self, file_path: str, content: str) -> Path:
+        return _write_generated_file(self.output_path, file_path, content, self.existing_files, streamed=self.stream)
+    
+    def write_batch(self, contents: Dict[str, str]) -> Dict[str, Path]:
+        return _write_generated_batch(self.output_path, contents, self.existing_files, self.on_chunk)
+    
+    @contextmanager
+    def files_step(self, graph: Dict[str, Dict], total_files: int, step: str, **attributes) -> Iterator[_FilesProgress]:
+        """Trace one pass over a graph's files, yielding the progress its results are recorded in"""
+        progress = _FilesProgress(self, graph, total_files)
+        with trace_span(step, "step", files=total_files, **attributes) as span:
+            yield progress
+            span["failed"] = len(progress.failed)
+    
+    def retry_graph(self, failed: List[str], retry_round: int) -> Optional[Dict[str, Dict]]:
+        """Failed files for another attempt, or None once none failed or the budget is spent"""
+        if not failed or self.ledger.exhausted:
+            return None
+        return _retry_graph(self.file_graph, failed, retry_round)
+    
+    def validate(self, paths: List[str]) -> Dict[str, str]:
+        """Files among paths that fail the syntax check (none are checked once the budget is spent)"""
+        if not paths or self.ledger.exhausted:
+            return {}
+        return _validate_generated(self.output_path, self.existing_files, paths)
+    
+    def repair_graph(self, broken: Dict[str, str], repair_round: int) -> Dict[str, Dict]:
+        return _repair_graph(self.file_graph, broken, repair_round)
+    
+    def needs_readme(self) -> bool:
+        """Step 4 with the saved README; whether it still has to be generated (not once the budget is spent)"""
+        self.readme_content = _reuse_step(self.manifest, "readme", "README.md")
+        if self.ledger.exhausted:
+            _print_budget_stop(self.ledger)
+            return False
+        if self.readme_content is None:
+            _print_readme_step()
+            return True
+        return False
+    
+    def finish(self) -> Path:
+        _finish_build(
+            self.output_path, self.readme_content, self.existing_files, len(self.file_graph), self.manifest,
+            self.ledger, self.tracer, len(self.rendered), len(self.seeded),
+        )
+        return self.output_path
+
+
+def build_prototype(
     builder_prompt: str,
-    architecture: Dict,
-    phases: List[Dict],
-    llm: Optional[BaseChatModel] = None,
-) -> str:
-    """Generate a comprehensive README for the prototype"""
+    output_dir: str = BUILD_OUTPUT_DIR,
+    provider: Optional[Literal["openai", "anthropic", "ollama"]] = None,
+    model: Optional[str] = None,
+    max_workers: int = BUILD_MAX_WORKERS,
+    use_cache: bool = True,
+    resume: bool = False,
+    architecture: Optional[Dict] = None,
+    phases: Optional[List[Dict]] = None,
+    stream: bool = False,
+    on_chunk: Optional[Callable[[str, str], None]] = None,
+    max_cost: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    batch_small_files: bool = False,
+    route_models: bool = False,
+    incremental: bool = False,
+    validate: bool = True,
+    cassette: Optional[LLMCassette] = None,
+    use_templates: bool = True,
+) -> Path:
+    """
+    Main function: Build the prototype step by step
+    
+    Args:
+        builder_prompt: The builder prompt from MVP Planner Agent
+        output_dir: Directory to output the prototype
+        provider: LLM provider ("openai", "anthropic", or "ollama")
+        model: Model name for the provider
+        max_workers: Maximum number of files generated in parallel
+        use_cache: Serve unchanged LLM calls from the on-disk response cache
+        resume: Continue a previous build in output_dir from its build_manifest.json,
+            reusing the saved architecture, plan and intact files
+        architecture: Architecture already generated (e.g. reviewed in the UI); skips Step 1
+        phases: Implementation plan phases already generated from that architecture; skips Step 2
+        stream: Stream each file's code to disk as it is generated
+        on_chunk: Called as on_chunk(file_path, text) with each piece of streamed code (implies stream)
+        max_cost: Stop starting new LLM calls once this many dollars are spent (see ledger.json)
+        max_tokens: Stop starting new LLM calls once this many tokens are used
+        batch_small_files: Generate small files of a phase (package markers, config,
+            constants) several per call, up to BUILD_BATCH_MAX_FILES
+        route_models: Send boilerplate, docs and routine files to the cheaper
+            MODEL_TIERS models and keep the build's model for architecture, plan
+            and complex files
+        incremental: Rebuild an existing build in output_dir after the builder prompt
+            changed: only files whose plan entries were added or changed, and files
+            depending on them, are regenerated; files dropped from the plan are deleted
+        validate: Syntax-check generated files locally after the build and regenerate
+            the ones that fail, with their errors, up to BUILD_VALIDATION_ROUNDS times
+        cassette: Record every LLM call of the build to, or replay them from, this
+            cassette (see open_cassette); used instead of the response cache
+        use_templates: Render boilerplate files (package markers, ignore files,
+            tsconfig, env examples, BUILD_TEMPLATE_DIR templates) without an LLM call
+    """
+    run = _BuildRun(
+        builder_prompt, output_dir, provider, model, use_cache, resume, incremental, architecture, phases,
+        stream, on_chunk, max_cost, max_tokens, route_models, cassette,
+    )
+    
+    # Step 1: Generate tech stack and architecture
+    if run.needs_architecture():
+        with run.llm_step("architecture", "architecture") as llm_instance:
+            run.save_architecture(generate_tech_stack_and_architecture(builder_prompt, llm_instance))
+    
+    # Step 2: Generate implementation plan
+    if run.needs_plan():
+        with run.llm_step("plan", "plan") as llm_instance:
+            run.save_plan(
+                generate_implementation_plan(builder_prompt, run.architecture, llm_instance, run.previous_phases)
+            )
+    
+    # Step 3: Generate files as soon as their dependencies exist
+    run_graph = run.prepare_files(max_workers, use_templates, batch_small_files)
+    
+    def generate_and_write(file_path: str, file_info: Dict):
+        with run.file_step(file_path, file_info) as llm_instance:
+            if "batch" in file_info:
+                contents = generate_file_batch(**run.batch_request(file_info, llm_instance))
+                for info in run.left_out(file_info, contents):
+                    with run.file_label(info["path"], info) as file_llm:
+                        contents[info["path"]] = generate_file_content(**run.file_request(info, file_llm, stream=False))
+                return run.write_batch(contents)
+            full_path = run.render_template(file_path, file_info)
+            if full_path is not None:
+                return full_path
+            return run.write_file(file_path, generate_file_content(**run.file_request(file_info, llm_instance)))
+    
+    def generate_files(graph: Dict[str, Dict], total_files: int, step: str, **attributes) -> List[str]:
+        """Generate a graph's files as one traced step, returning those that failed"""
+        with run.files_step(graph, total_files, step, **attributes) as progress:
+            for node, result, error in iter_file_graph(
+                graph, generate_and_write, max_workers, stop=lambda: run.ledger.exhausted
+            ):
+                progress.record(node, result, error)
+        return progress.failed
+    
+    failed = generate_files(run_graph, len(run.pending_graph), "files")
+    for retry_round in range(1, BUILD_RETRY_ROUNDS + 1):
+        retry_graph = run.retry_graph(failed, retry_round)
+        if retry_graph is None:
+            break
+        failed = generate_files(retry_graph, len(failed), "retry", round=retry_round)
+    
+    # Regenerate only the files that don't parse, then check those again
+    checked = list(run.file_graph) if validate else []
+    for repair_round in range(1, BUILD_VALIDATION_ROUNDS + 2):
+        broken = run.validate(checked)
+        if not broken or repair_round > BUILD_VALIDATION_ROUNDS:
+            break
+        generate_files(run.repair_graph(broken, repair_round), len(broken), "repair", round=repair_round)
+        checked = list(broken)
+    
+    # Step 4: Generate README and setup instructions
+    if run.needs_readme():
+        with run.llm_step("readme", "README.md") as llm_instance:
+            run.readme_content = generate_readme(builder_prompt, run.architecture, run.phases, llm_instance)
+    return run.finish()
+
+
+async def build_prototype_async(
+    builder_prompt: str,
+    output_dir: str = BUILD_OUTPUT_DIR,
+    provider: Optional[Literal["openai", "anthropic", "ollama"]] = None,
+    model: Optional[str] = None,
+    max_workers: int = BUILD_MAX_WORKERS,
+    use_cache: bool = True,
+    resume: bool = False,
+    architecture: Optional[Dict] = None,
+    phases: Optional[List[Dict]] = None,
+    stream: bool = False,
+    on_chunk: Optional[Callable[[str, str], None]] = None,
+    max_cost: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    batch_small_files: bool = False,
+    route_models: bool = False,
+    incremental: bool = False,
+    validate: bool = True,
+    cassette: Optional[LLMCassette] = None,
+    use_templates: bool = True,
+) -> Path:
+    """
+    Async twin of build_prototype.
+    
+    Every LLM call goes through ainvoke and files are generated as tasks on the
+    running event loop, so many builds can share one loop without a thread each.
+    """
+    run = _BuildRun(
+        builder_prompt, output_dir, provider, model, use_cache, resume, incremental, architecture, phases,
+        stream, on_chunk, max_cost, max_tokens, route_models, cassette,
+    )
+    
+    if run.needs_architecture():
+        with run.llm_step("architecture", "architecture") as llm_instance:
+            run.save_architecture(await generate_tech_stack_and_architecture_async(builder_prompt, llm_instance))
+    
+    if run.needs_plan():
+        with run.llm_step("plan", "plan") as llm_instance:
+            run.save_plan(
+                await generate_implementation_plan_async(
+                    builder_prompt, run.architecture, llm_instance, run.previous_phases
+                )
+            )
+    
+    run_graph = run.prepare_files(max_workers, use_templates, batch_small_files)
+    
+    async def generate_and_write(file_path: str, file_info: Dict):
+        with run.file_step(file_path, file_info) as llm_instance:
+            if "batch" in file_info:
+                contents = await generate_file_batch_async(**run.batch_request(file_info, llm_instance))
+                for info in run.left_out(file_info, contents):
+                    with run.file_label(info["path"], info) as file_llm:
+                        contents[info["path"]] = await generate_file_content_async(
+                            **run.file_request(info, file_llm, stream=False)
+                        )
+                return run.write_batch(contents)
+            full_path = run.render_template(file_path, file_info)
+            if full_path is not None:
+                return full_path
+            content = await generate_file_content_async(**run.file_request(file_info, llm_instance))
+            return run.write_file(file_path, content)
+    
+    async def generate_files(graph: Dict[str, Dict], total_files: int, step: str, **attributes) -> List[str]:
+        with run.files_step(graph, total_files, step, **attributes) as progress:
+            async for node, result, error in iter_file_graph_async(
+                graph, generate_and_write, max_workers, stop=lambda: run.ledger.exhausted
+            ):
+                progress.record(node, result, error)
+        return progress.failed
+    
+    failed = await generate_files(run_graph, len(run.pending_graph), "files")
+    for retry_round in range(1, BUILD_RETRY_ROUNDS + 1):
+        retry_graph = run.retry_graph(failed, retry_round)
+        if retry_graph is None:
+            break
+        failed = await generate_files(retry_graph, len(failed), "retry", round=retry_round)
+    
+    checked = list(run.file_graph) if validate else []
+    for repair_round in range(1, BUILD_VALIDATION_ROUNDS + 2):
+        broken = await asyncio.to_thread(run.validate, checked)
+        if not broken or repair_round > BUILD_VALIDATION_ROUNDS:
+            break
+        await generate_files(run.repair_graph(broken, repair_round), len(broken), "repair", round=repair_round)
+        checked = list(broken)
+    
+    if run.needs_readme():
+        with run.llm_step("readme", "README.md") as llm_instance:
+            run.readme_content = await generate_readme_async(builder_prompt, run.architecture, run.phases, llm_instance)
+    return run.finish()
+
+
+def _readme_messages(builder_prompt: str, architecture: Dict, phases: List[Dict]) -> List[BaseMessage]:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    
     system_prompt = """You are a technical writer creating clear, comprehensive README files for software projects.
 
 Create a README that includes:
@@ -579,10 +1989,10 @@ Create a README that includes:
 
 Make it professional and easy to follow."""
 
-    architecture_str = json.dumps(architecture, indent=2)
-    phases_str = json.dumps(phases, indent=2)
+    architecture_str = compact_json(architecture_outline(architecture))
+    phases_str = compact_json(phases)
     
-    messages = [
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=f"""Builder Prompt:
 {builder_prompt}
@@ -595,11 +2005,9 @@ Implementation Phases:
 
 Generate a comprehensive README.md file:""")
     ]
-    
-    llm_instance = llm or get_llm()
-    response = llm_instance.invoke(messages)
-    content = response.content
-    
+
+
+def _clean_readme(content: str) -> str:
     # Clean up markdown formatting if needed
     if content.startswith("```markdown"):
         content = content[11:]
@@ -611,8 +2019,117 @@ Generate a comprehensive README.md file:""")
     return content.strip()
 
 
+def generate_readme(
+    builder_prompt: str,
+    architecture: Dict,
+    phases: List[Dict],
+    llm: Optional[BaseChatModel] = None,
+) -> str:
+    """Generate a comprehensive README for the prototype"""
+    llm_instance = llm or get_llm()
+    response = _invoke(llm_instance, _readme_messages(builder_prompt, architecture, phases))
+    return _clean_readme(response.content)
+
+
+async def generate_readme_async(
+    builder_prompt: str,
+    architecture: Dict,
+    phases: List[Dict],
+    llm: Optional[BaseChatModel] = None,
+) -> str:
+    """Async twin of generate_readme"""
+    llm_instance = llm or get_llm()
+    response = await _ainvoke(llm_instance, _readme_messages(builder_prompt, architecture, phases))
+    return _clean_readme(response.content)
+
+
+def _print_streamed_lines() -> Callable[[str, str], None]:
+    """on_chunk callback that prints complete lines of streamed code, prefixed by file"""
+    partial_lines: Dict[str, str] = {}
+    lock = threading.Lock()
+    
+    def print_chunk(file_path: str, text: str) -> None:
+        with lock:
+            *lines, partial_lines[file_path] = (partial_lines.get(file_path, "") + text).split("\n")
+            for line in lines:
+                print(f"   {file_path} │ {line}")
+    
+    return print_chunk
+
+
 def main() -> None:
     """CLI entry point"""
+    parser = argparse.ArgumentParser(description="Build a working prototype from a builder prompt.")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Call the LLM for every step instead of reusing responses cached in {BUILD_CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted build in the output directory, generating only missing or failed files",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Show each file's code live as it is generated",
+    )
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        help="Stop starting new LLM calls once this many dollars are spent",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="Stop starting new LLM calls once this many tokens are used",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help=f"Generate small files (package markers, config, constants) up to {BUILD_BATCH_MAX_FILES} per LLM call",
+    )
+    parser.add_argument(
+        "--route-models",
+        action="store_true",
+        help="Use cheaper models (MODEL_TIERS) for boilerplate, docs and routine files",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="After changing the builder prompt, regenerate only files whose plan entries changed and their dependents",
+    )
+    parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="Skip the post-build syntax check and regeneration of files that fail it",
+    )
+    parser.add_argument(
+        "--no-templates",
+        action="store_true",
+        help="Generate boilerplate files with the LLM too instead of rendering them from templates",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record",
+        metavar="CASSETTE",
+        help="Save every LLM request and response of the build to this compressed cassette (e.g. build.jsonl.gz)",
+    )
+    cassette_group.add_argument(
+        "--replay",
+        metavar="CASSETTE",
+        help="Answer every LLM call from a recorded cassette, offline and without API spend",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        metavar="SCALE",
+        help="With --replay, wait SCALE times each call's recorded latency (default 0: answer at once)",
+    )
+    args = parser.parse_args()
+    
     print("\n=== MVP Builder Agent ===")
     print("This agent builds a working prototype from a builder prompt.\n")
     
@@ -641,11 +2158,35 @@ def main() -> None:
         f"Output directory (default: {BUILD_OUTPUT_DIR}): "
     ).strip() or BUILD_OUTPUT_DIR
     
+    cassette = None
+    if args.record:
+        cassette = open_cassette(args.record, "record")
+    elif args.replay:
+        cassette = open_cassette(args.replay, "replay", args.replay_latency)
+    
     try:
-        build_prototype(builder_prompt, output_dir)
+        build_prototype(
+            builder_prompt,
+            output_dir,
+            use_cache=not args.no_cache,
+            resume=args.resume,
+            on_chunk=_print_streamed_lines() if args.stream else None,
+            max_cost=args.max_cost,
+            max_tokens=args.max_tokens,
+            batch_small_files=args.batch,
+            route_models=args.route_models,
+            incremental=args.incremental,
+            validate=not args.no_validate,
+            cassette=cassette,
+            use_templates=not args.no_templates,
+        )
     except Exception as e:
         print(f"\n❌ Error building prototype: {e}")
         raise
+    finally:
+        if cassette is not None:
+            cassette.close()
+            print(f"📼 Cassette: {cassette.summary()}")
 
 
 if __name__ == "__main__":
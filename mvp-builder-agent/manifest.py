@@ -0,0 +1,115 @@
+"""Build manifest: checkpoints of a build's steps and files for resuming."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+MANIFEST_FILENAME = "build_manifest.json"
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BuildManifest:
+    """
+    Records the status and content hash of every step and file of a build.
+
+    Saved as build_manifest.json in the output directory after each change, so
+    an interrupted build can be resumed: steps and files whose output is still
+    on disk with the recorded hash are reused, everything else is regenerated.
+    """
+
+    def __init__(self, output_path: Path, prompt_hash: str, data: Optional[Dict] = None):
+        self.output_path = output_path
+        self.path = output_path / MANIFEST_FILENAME
+        self.data = data or {"prompt_sha256": prompt_hash, "steps": {}, "files": {}}
+
+    @classmethod
+    def open(cls, output_path: Path, builder_prompt: str, resume: bool, incremental: bool = False) -> "BuildManifest":
+        """
+        Load the manifest to resume from, or start a fresh one.
+
+        With incremental, a changed builder prompt keeps the generated files'
+        records (the caller decides which to rebuild) but drops every step.
+        """
+        prompt_hash = hash_text(builder_prompt)
+        manifest_path = output_path / MANIFEST_FILENAME
+        resume = resume or incremental
+        if not resume:
+            return cls(output_path, prompt_hash)
+        if not manifest_path.exists():
+            print(f"⚠️  No {MANIFEST_FILENAME} in {output_path}, starting a fresh build\n")
+            return cls(output_path, prompt_hash)
+
+        try:
+            data = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️  Could not read {manifest_path} ({e}), starting a fresh build\n")
+            return cls(output_path, prompt_hash)
+
+        if data.get("prompt_sha256") != prompt_hash and incremental:
+            print("🔁 Builder prompt changed since the last build, regenerating architecture and plan\n")
+            return cls(output_path, prompt_hash, {**data, "prompt_sha256": prompt_hash, "steps": {}})
+        if data.get("prompt_sha256") != prompt_hash:
+            print("⚠️  Builder prompt changed since the last build, starting a fresh build\n")
+            return cls(output_path, prompt_hash)
+        return cls(output_path, prompt_hash, data)
+
+    def save(self) -> None:
+        # Write to a temp file and rename so an interrupted save never corrupts the manifest
+        tmp_path = self.path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _load(self, entry: Optional[Dict], file_path: Path) -> Optional[str]:
+        if not entry or entry.get("status") != "done" or not file_path.is_file():
+            return None
+        content = file_path.read_text(encoding="utf-8")
+        return content if hash_text(content) == entry.get("sha256") else None
+
+    def load_step(self, step: str) -> Optional[str]:
+        """Return the saved output of a completed step, or None if it must run again."""
+        entry = self.data["steps"].get(step)
+        return self._load(entry, self.output_path / entry["file"]) if entry else None
+
+    def mark_step(self, step: str, file_name: str, content: str) -> None:
+        digest = hash_text(content)
+        steps = self.data["steps"]
+        if step in steps and steps[step].get("sha256") != digest:
+            # Later steps were built from the old output of this one
+            names = list(steps)
+            for later in names[names.index(step) + 1:]:
+                del steps[later]
+        steps[step] = {"status": "done", "file": file_name, "sha256": digest}
+        self.save()
+
+    def load_file(self, file_path: str) -> Optional[str]:
+        """Return the content of a generated file that is still intact on disk, or None."""
+        return self._load(self.data["files"].get(file_path), self.output_path / file_path)
+
+    def mark_pending(self, file_paths) -> None:
+        for file_path in file_paths:
+            if self.data["files"].get(file_path, {}).get("status") != "done":
+                self.data["files"][file_path] = {"status": "pending"}
+        self.save()
+
+    def invalidate_files(self, file_paths) -> None:
+        """Mark files to be regenerated even though they are intact on disk."""
+        for file_path in file_paths:
+            self.data["files"][file_path] = {"status": "pending"}
+        self.save()
+
+    def forget_files(self, file_paths) -> None:
+        for file_path in file_paths:
+            self.data["files"].pop(file_path, None)
+        self.save()
+
+    def mark_file(self, file_path: str, content: Optional[str] = None, error: Optional[BaseException] = None) -> None:
+        if error is None:
+            self.data["files"][file_path] = {"status": "done", "sha256": hash_text(content)}
+        else:
+            self.data["files"][file_path] = {"status": "failed", "error": str(error)}
+        self.save()
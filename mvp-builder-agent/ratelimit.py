@@ -0,0 +1,101 @@
+"""Client-side rate limiting of LLM calls, shared across builds."""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+
+class ProviderRateLimiter(BaseRateLimiter, BaseCallbackHandler):
+    """
+    Token buckets for requests and tokens per minute of one provider/model.
+
+    Set as a chat model's rate_limiter, every call (cache hits excepted) waits
+    for a request slot. Token usage is only known once a response arrives, so
+    the same object is also registered as a callback: each response's tokens
+    are debited afterwards and new calls wait while the token bucket is in debt.
+    """
+
+    run_inline = True
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        minutes = (now - self._updated) / 60
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + minutes * self.requests_per_minute)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + minutes * self.tokens_per_minute)
+
+    def _reserve(self) -> float:
+        """Take a request slot and return 0, or return how long to wait for one."""
+        with self._lock:
+            self._refill()
+            wait = 0.0
+            if self.requests_per_minute and self._requests < 1:
+                wait = (1 - self._requests) * 60 / self.requests_per_minute
+            if self.tokens_per_minute and self._tokens <= 0:
+                wait = max(wait, (1 - self._tokens) * 60 / self.tokens_per_minute)
+            if wait == 0 and self.requests_per_minute:
+                self._requests -= 1
+            return wait
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        while (wait := self._reserve()) > 0:
+            if not blocking:
+                return False
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while (wait := self._reserve()) > 0:
+            if not blocking:
+                return False
+            await asyncio.sleep(wait)
+        return True
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if not self.tokens_per_minute:
+            return
+        used = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                used += usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+        with self._lock:
+            self._refill()
+            self._tokens -= used
+
+
+_limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter_for(provider: str, model: str, limits: Dict[str, Dict]) -> Optional[ProviderRateLimiter]:
+    """
+    The process-wide limiter for a provider/model, or None if it has no limits.
+
+    limits maps "provider:model" or "provider" to {"rpm": ..., "tpm": ...};
+    every model instance and build in the process shares one limiter per key.
+    """
+    config = limits.get(f"{provider}:{model}") or limits.get(provider)
+    if not config or not (config.get("rpm") or config.get("tpm")):
+        return None
+    with _limiters_lock:
+        key = (provider, model)
+        if key not in _limiters:
+            _limiters[key] = ProviderRateLimiter(config.get("rpm"), config.get("tpm"))
+        return _limiters[key]
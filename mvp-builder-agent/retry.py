@@ -0,0 +1,107 @@
+"""Retrying LLM calls on rate limits and transient errors, with jittered exponential backoff."""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 409, 429}
+_RETRYABLE_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError", "OverloadedError",
+    "ConnectError", "ConnectTimeout", "ReadTimeout", "ReadError", "RemoteProtocolError", "PoolTimeout",
+}
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, overload, server errors and dropped connections are worth retrying."""
+    status = _status_code(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS or status >= 500
+    return type(error).__name__ in _RETRYABLE_ERRORS or isinstance(error, (TimeoutError, ConnectionError))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The delay a provider asked for in Retry-After(-ms) headers, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    if (value := headers.get("retry-after-ms")) is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if (value := headers.get("retry-after")) is not None:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def backoff_delay(error: BaseException, attempt: int, base_delay: float, max_delay: float) -> float:
+    """Retry-After if the provider sent one, else exponential backoff with jitter."""
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base_delay)
+    return min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    on_retry: Optional[Callable[[BaseException, float], None]] = None,
+) -> T:
+    """
+    Call fn, retrying retryable errors up to attempts times in total.
+
+    on_retry(error, delay) is called before each retry.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            delay = backoff_delay(e, attempt, base_delay, max_delay)
+            print(f"⏳ {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{attempts - 1})")
+            if on_retry is not None:
+                on_retry(e, delay)
+            time.sleep(delay)
+    raise RuntimeError("attempts must be at least 1")
+
+
+async def acall_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    on_retry: Optional[Callable[[BaseException, float], None]] = None,
+) -> T:
+    """Async twin of call_with_retry"""
+    for attempt in range(attempts):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            delay = backoff_delay(e, attempt, base_delay, max_delay)
+            print(f"⏳ {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{attempts - 1})")
+            if on_retry is not None:
+                on_retry(e, delay)
+            await asyncio.sleep(delay)
+    raise RuntimeError("attempts must be at least 1")
@@ -0,0 +1,82 @@
+"""Routing each build step to a model tier by how demanding it is."""
+
+import threading
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from batching import is_small_file
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
+FLAGSHIP = "flagship"
+STANDARD = "standard"
+FAST = "fast"
+
+# Architecture and plan shape every file, so they get the build's own model
+STEP_TIERS = {"architecture": FLAGSHIP, "plan": FLAGSHIP, "readme": FAST}
+
+_DOC_SUFFIXES = {".md", ".rst", ".txt", ".css", ".scss", ".html", ".svg", ".xml"}
+
+
+def file_tier(file_info: Dict) -> str:
+    """
+    Tier for generating a planned file (or a batch of small files).
+
+    Boilerplate, config and docs go to the fast tier; files in high-complexity
+    phases or with many dependencies (a sign of a central module) to the
+    flagship; everything else to the standard tier.
+    """
+    if "batch" in file_info or is_small_file(file_info):
+        return FAST
+    if PurePosixPath(file_info["path"]).suffix.lower() in _DOC_SUFFIXES:
+        return FAST
+    if file_info.get("phase_complexity") == "high" or len(file_info.get("dependencies", [])) >= 4:
+        return FLAGSHIP
+    return STANDARD
+
+
+class ModelRouter:
+    """
+    Hands out one chat model per tier for a build.
+
+    The flagship tier is the model the build was started with; the others come
+    from tier_models as (provider, model) and are created on first use. A tier
+    whose model can't be created (e.g. a missing API key or an Ollama model
+    that isn't pulled) falls back to the flagship with a warning. With no
+    tier_models every step uses the flagship.
+    """
+
+    def __init__(
+        self,
+        flagship_llm: "BaseChatModel",
+        flagship_model: Tuple[str, str],
+        tier_models: Dict[str, Tuple[str, str]],
+        create: Callable[[str, str], "BaseChatModel"],
+    ):
+        self.enabled = bool(tier_models)
+        self._models = {**tier_models, FLAGSHIP: flagship_model}
+        self._llms: Dict[str, "BaseChatModel"] = {FLAGSHIP: flagship_llm}
+        self._create = create
+        self._lock = threading.Lock()
+
+    def llm_for(self, tier: Optional[str]) -> "BaseChatModel":
+        tier = tier if tier in self._models else FLAGSHIP
+        with self._lock:
+            if tier not in self._llms and self._models[tier] == self._models[FLAGSHIP]:
+                self._llms[tier] = self._llms[FLAGSHIP]
+            if tier not in self._llms:
+                provider, model = self._models[tier]
+                try:
+                    self._llms[tier] = self._create(provider, model)
+                except (RuntimeError, ValueError) as e:
+                    print(f"⚠️  {tier} tier ({provider}/{model}) unavailable, using the flagship model: {e}")
+                    self._models[tier] = self._models[FLAGSHIP]
+                    self._llms[tier] = self._llms[FLAGSHIP]
+            return self._llms[tier]
+
+    def tier_for_step(self, step: str) -> Optional[str]:
+        return STEP_TIERS.get(step, FLAGSHIP) if self.enabled else None
+
+    def tier_for_file(self, file_info: Dict) -> Optional[str]:
+        return file_tier(file_info) if self.enabled else None
@@ -0,0 +1,179 @@
+"""Dependency-aware scheduling for parallel file generation."""
+
+import asyncio
+import contextvars
+import heapq
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def build_file_graph(phases: List[Dict]) -> Dict[str, Dict]:
+    """
+    Flatten the implementation plan into a dependency graph.
+
+    Args:
+        phases: Phases from generate_implementation_plan
+
+    Returns:
+        Ordered dict of {path: file_info} in plan order. Each file_info gains
+        "phase_number", "phase_name" and "phase_complexity", and its "dependencies" are reduced to
+        other planned files (unknown paths and self-references are dropped).
+    """
+    graph: Dict[str, Dict] = {}
+    for phase in phases:
+        phase_num = phase.get("phase_number", 0)
+        phase_name = phase.get("name", f"Phase {phase_num}")
+        for file_info in phase.get("files_to_create", []):
+            path = file_info.get("path", "")
+            if not path or path in graph:
+                continue
+            graph[path] = {
+                **file_info,
+                "phase_number": phase_num,
+                "phase_name": phase_name,
+                "phase_complexity": phase.get("estimated_complexity"),
+            }
+
+    for path, file_info in graph.items():
+        file_info["dependencies"] = [
+            dep for dep in dict.fromkeys(file_info.get("dependencies") or [])
+            if dep in graph and dep != path
+        ]
+    return graph
+
+
+def select_files(graph: Dict[str, Dict], paths) -> Dict[str, Dict]:
+    """
+    Restrict a file graph to the given paths, keeping plan order.
+
+    Dependencies on files outside the selection are treated as already built.
+    """
+    selected = set(paths)
+    return {path: info for path, info in graph.items() if path in selected}
+
+
+class _ReadyQueue:
+    """Tracks which files of a graph can start, in plan order."""
+
+    def __init__(self, graph: Dict[str, Dict]):
+        self.paths = list(graph)
+        self.order = {path: index for index, path in enumerate(self.paths)}
+        self.remaining = {}
+        self.dependents: Dict[str, List[str]] = defaultdict(list)
+        # A node with a "batch" list generates all of those files
+        owner = {member: path for path, info in graph.items() for member in info.get("batch", ())}
+        for path, info in graph.items():
+            # Dependencies outside the graph are already built
+            deps = [
+                dep for dep in dict.fromkeys(owner.get(dep, dep) for dep in info["dependencies"])
+                if dep in graph and dep != path
+            ]
+            self.remaining[path] = len(deps)
+            for dep in deps:
+                self.dependents[dep].append(path)
+        self.ready = [self.order[path] for path, count in self.remaining.items() if count == 0]
+        heapq.heapify(self.ready)
+        self.started = set()
+
+    @property
+    def exhausted(self) -> bool:
+        return len(self.started) == len(self.paths)
+
+    def pop(self) -> Optional[str]:
+        """Return the next file whose dependencies are done, or None."""
+        while self.ready:
+            path = self.paths[heapq.heappop(self.ready)]
+            if path not in self.started:
+                self.started.add(path)
+                return path
+        return None
+
+    def break_cycle(self) -> None:
+        """Make the earliest unstarted file ready, ignoring its dependencies."""
+        heapq.heappush(self.ready, min(self.order[p] for p in self.paths if p not in self.started))
+
+    def complete(self, path: str) -> None:
+        for dependent in self.dependents[path]:
+            self.remaining[dependent] -= 1
+            if self.remaining[dependent] == 0 and dependent not in self.started:
+                heapq.heappush(self.ready, self.order[dependent])
+
+
+def _stopped(stop: Optional[Callable[[], bool]]) -> bool:
+    return stop is not None and stop()
+
+
+def iter_file_graph(
+    graph: Dict[str, Dict],
+    worker: Callable[[str, Dict], Any],
+    max_workers: int,
+    stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[str, Any, Optional[BaseException]]]:
+    """
+    Run worker(path, file_info) for every file, as soon as its dependencies finish.
+
+    Ready files are started in plan order, up to max_workers at a time. A file
+    whose dependency failed is still generated, and a dependency cycle is broken
+    by starting the earliest pending file in plan order. Once stop() returns
+    True no new files are started; running ones are allowed to finish.
+
+    Yields:
+        (path, result, error) tuples in completion order
+    """
+    queue = _ReadyQueue(graph)
+    max_workers = max(1, max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while True:
+            while len(running) < max_workers and not _stopped(stop) and (path := queue.pop()) is not None:
+                # Workers see the caller's context variables (ledger label, trace span)
+                context = contextvars.copy_context()
+                running[executor.submit(context.run, worker, path, graph[path])] = path
+
+            if not running:
+                if queue.exhausted or _stopped(stop):
+                    break
+                queue.break_cycle()
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = running.pop(future)
+                queue.complete(path)
+                error = future.exception()
+                yield path, None if error else future.result(), error
+
+
+async def iter_file_graph_async(
+    graph: Dict[str, Dict],
+    worker: Callable[[str, Dict], Awaitable[Any]],
+    max_workers: int,
+    stop: Optional[Callable[[], bool]] = None,
+) -> AsyncIterator[Tuple[str, Any, Optional[BaseException]]]:
+    """Async twin of iter_file_graph: runs coroutine workers on the current event loop."""
+    queue = _ReadyQueue(graph)
+    max_workers = max(1, max_workers)
+    running: Dict[asyncio.Task, str] = {}
+
+    try:
+        while True:
+            while len(running) < max_workers and not _stopped(stop) and (path := queue.pop()) is not None:
+                running[asyncio.ensure_future(worker(path, graph[path]))] = path
+
+            if not running:
+                if queue.exhausted or _stopped(stop):
+                    break
+                queue.break_cycle()
+                continue
+
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                path = running.pop(task)
+                queue.complete(path)
+                error = task.exception()
+                yield path, None if error else task.result(), error
+    finally:
+        for task in running:
+            task.cancel()
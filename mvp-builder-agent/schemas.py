@@ -0,0 +1,69 @@
+"""Schemas of the architecture and plan responses, validated by structured.parse_structured."""
+
+from typing import Any, Dict, List, Literal
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+
+# Schemas are built on first validation rather than at import, keeping CLI startup fast
+_SCHEMA_CONFIG = ConfigDict(extra="allow", defer_build=True)
+
+
+class TechStack(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
+    # Any: models often list several technologies per layer
+    frontend: Any = "N/A"
+    backend: Any = "N/A"
+    database: Any = "N/A"
+    deployment: Any = "N/A"
+    justification: Any = ""
+
+
+class ArchitectureOverview(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
+    layers: List[Any] = Field(default_factory=list)
+    modules: List[Any] = Field(default_factory=list)
+    data_flow: Any = ""
+
+
+class Architecture(BaseModel):
+    """Tech stack and architecture returned by Step 1."""
+
+    model_config = _SCHEMA_CONFIG
+
+    tech_stack: TechStack
+    architecture: ArchitectureOverview = Field(default_factory=ArchitectureOverview)
+    project_structure: Dict[str, Any] = Field(default_factory=dict)
+
+
+class PlannedFile(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
+    path: str = Field(min_length=1)
+    purpose: str = ""
+    dependencies: List[str] = Field(default_factory=list)
+
+
+class Phase(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
+    phase_number: int
+    name: str
+    description: str = ""
+    files_to_create: List[PlannedFile] = Field(default_factory=list)
+    estimated_complexity: Literal["low", "medium", "high"] = "medium"
+
+    @field_validator("estimated_complexity", mode="before")
+    @classmethod
+    def _normalize_complexity(cls, value: Any) -> Any:
+        return value.strip().lower() if isinstance(value, str) else value
+
+
+class ImplementationPlan(BaseModel):
+    """Phases returned by Step 2."""
+
+    model_config = _SCHEMA_CONFIG
+
+    phases: List[Phase]
@@ -0,0 +1,55 @@
+"""Files whose content the architecture's project structure already returned."""
+
+from pathlib import PurePosixPath
+from typing import Callable, Container, Dict
+
+
+def _prune(structure: Dict, prefix: str, skip: Callable[[str], bool]) -> Dict:
+    pruned = {}
+    for name, content in structure.items():
+        name = name.strip("/")
+        path = prefix + name
+        if isinstance(content, dict):
+            children = _prune(content, path + "/", skip)
+            if children:
+                pruned[name] = children
+        elif isinstance(content, str) and content.strip() and not skip(path):
+            pruned[name] = content
+    return pruned
+
+
+def seed_structure(
+    structure: Dict, file_graph: Dict[str, Dict], existing_files: Container[str], kept: Container[str] = ()
+) -> Dict:
+    """
+    The part of the project structure to write as it is.
+
+    Keeps files with content (null or blank marks a file left to the plan),
+    except files already built, planned files marked "regenerate" and kept
+    files (e.g. ones already on disk, which may have been edited). A
+    directory wrapping the whole tree in the project's name is removed, so
+    paths line up with the plan's.
+
+    Returns:
+        Nested {directory: {...}, file: content} dict for create_project_structure
+    """
+    if len(structure) == 1:
+        root_name, root = next(iter(structure.items()))
+        top_directories = {PurePosixPath(path).parts[0] for path in file_graph}
+        if isinstance(root, dict) and root_name.strip("/") not in top_directories:
+            structure = root
+    regenerate = {path for path, file_info in file_graph.items() if file_info.get("regenerate")}
+    return _prune(structure, "", lambda path: path in regenerate or path in existing_files or path in kept)
+
+
+def structure_files(structure: Dict, prefix: str = "") -> Dict[str, str]:
+    """Flatten a nested structure into {path: content} of its files."""
+    files = {}
+    for name, content in structure.items():
+        path = prefix + name.strip("/")
+        if isinstance(content, dict):
+            files.update(structure_files(content, path + "/"))
+        elif content is not None:
+            files[path] = content
+    return files
+
@@ -0,0 +1,194 @@
+"""Streaming generated code to disk while it arrives."""
+
+import os
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, List, Optional
+
+# Lines at the end of the code so far that a continuation may repeat
+_OVERLAP_LINES = 20
+# Shorter repeats (a lone closing brace) are more likely new code than a repeat
+_MIN_OVERLAP_CHARS = 20
+
+
+def chunk_text(chunk: Any) -> str:
+    """Text of a streamed message chunk (plain string or a list of content blocks)."""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in content
+    )
+
+
+class CodeFenceFilter:
+    """
+    Streaming equivalent of stripping a markdown code fence from a response.
+
+    Drops an opening ```lang line, a closing ``` line and surrounding
+    whitespace. Lines that could still turn out to be the closing fence or trailing
+    whitespace are held back until later text shows they are code.
+
+    After cut(), the text fed next is the continuation of a response cut off at
+    the output limit: its opening fence is dropped again, its indentation kept,
+    and lines repeating the end of the code so far are skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._held: List[str] = []
+        self._trailing = ""
+        self._first_line = True
+        self._started = False
+        # Last code lines written, for spotting a continuation that repeats them
+        self._recent: Deque[str] = deque(maxlen=_OVERLAP_LINES)
+        # While a continuation starts: the lines it may repeat, and those it repeated so far
+        self._overlap: Optional[List[str]] = None
+        self._repeated: List[str] = []
+
+    def feed(self, text: str) -> str:
+        self._buffer += text
+        out = []
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            out.append(self._line(line))
+        return "".join(out)
+
+    def finish(self) -> str:
+        tail, self._buffer = self._buffer, ""
+        text = "" if tail.strip() in ("", "```") else self._line(tail)
+        if self._overlap is not None:
+            text += self._end_overlap()
+        return text
+
+    def cut(self) -> None:
+        """Drop the incomplete last line of a response cut off at the output limit; its continuation is fed next."""
+        self._buffer = ""
+        self._first_line = True
+        self._overlap = list(self._recent)
+        self._repeated = []
+
+    def _line(self, line: str) -> str:
+        if self._overlap is not None:
+            return self._continuation_line(line)
+        stripped = line.strip()
+        if not self._started and not stripped:
+            return ""
+        if self._first_line:
+            self._first_line = False
+            if stripped.startswith("```"):
+                return ""
+        if not self._started:
+            self._started = True
+            line = line.lstrip()
+            text = ""
+        elif not stripped or stripped == "```":
+            self._held.append(line)
+            return ""
+        else:
+            text = self._trailing + "".join("\n" + held for held in self._held) + "\n"
+            self._held = []
+        # Trailing whitespace is only written once more code follows it
+        code = line.rstrip()
+        self._trailing = line[len(code):]
+        self._recent.append(code)
+        return text + code
+
+    def _continuation_line(self, line: str) -> str:
+        """A line at the start of a continuation, up to where it stops repeating the code so far"""
+        stripped = line.strip()
+        code = line.rstrip()
+        # Blank lines before and after the opening fence come before the first code line
+        if not stripped and not self._repeated:
+            return ""
+        if self._first_line:
+            self._first_line = False
+            if stripped.startswith("```"):
+                return ""
+        if not self._repeated:
+            # The first line decides whether the continuation starts by repeating
+            starts = [index for index, recent in enumerate(self._overlap) if recent == code]
+            if not starts:
+                return self._replay(line)
+            self._overlap = self._overlap[starts[-1] + 1:]
+            self._repeated.append(line)
+        elif not stripped:
+            self._repeated.append(line)
+        elif self._overlap and code == self._overlap[0]:
+            self._overlap.pop(0)
+            self._repeated.append(line)
+        else:
+            return self._replay(line)
+        return self._end_overlap() if not self._overlap else ""
+
+    def _end_overlap(self) -> str:
+        """Drop the repeated lines, unless they are too short to tell from new code"""
+        if sum(len(line.strip()) for line in self._repeated) >= _MIN_OVERLAP_CHARS:
+            self._overlap = None
+            self._repeated = []
+            # The continuation repeats the blank lines after the code so far too
+            self._held = []
+            return ""
+        return self._replay(None)
+
+    def _replay(self, line: Optional[str]) -> str:
+        """Write lines held while they looked like a repeat, and the line that showed they weren't"""
+        lines = self._repeated + ([line] if line is not None else [])
+        self._overlap = None
+        self._repeated = []
+        return "".join(self._line(held) for held in lines)
+
+
+class StreamingFileWriter:
+    """
+    Writes fence-stripped code to a temp file next to its target as it streams in.
+
+    commit() renames the temp file into place, so the target only ever holds a
+    complete file; discard() removes the partial output after a failure.
+    """
+
+    def __init__(self, target: Optional[Path] = None, on_text: Optional[Callable[[str], None]] = None):
+        self.target = target
+        self.on_text = on_text
+        self._filter = CodeFenceFilter()
+        self._parts: List[str] = []
+        self._file = None
+        if target is not None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self._tmp_path = target.with_name(f".{target.name}.partial")
+            self._file = open(self._tmp_path, "w", encoding="utf-8")
+
+    def write(self, text: str) -> None:
+        self._emit(self._filter.feed(text))
+
+    def _emit(self, text: str) -> None:
+        if not text:
+            return
+        self._parts.append(text)
+        if self._file is not None:
+            self._file.write(text)
+            self._file.flush()
+        if self.on_text is not None:
+            self.on_text(text)
+
+    @property
+    def text(self) -> str:
+        """The code written so far."""
+        return "".join(self._parts)
+
+    def cut(self) -> None:
+        """Drop the incomplete last line of a response cut off at the output limit; its continuation is written next."""
+        self._filter.cut()
+
+    def commit(self) -> str:
+        self._emit(self._filter.finish())
+        if self._file is not None:
+            self._file.close()
+            os.replace(self._tmp_path, self.target)
+        return "".join(self._parts)
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._tmp_path.unlink(missing_ok=True)
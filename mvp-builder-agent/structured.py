@@ -0,0 +1,138 @@
+"""Structured output for the architecture and plan steps: JSON mode, parsing and repair."""
+
+import json
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Type
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import BaseMessage
+    from langchain_core.runnables import Runnable
+    from pydantic import BaseModel
+
+
+class StructuredOutputError(RuntimeError):
+    """A response that could not be parsed into its schema."""
+
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+# Bare True/False/None in value position (not inside a string)
+_PYTHON_LITERAL = re.compile(r"([:\[,]\s*)(True|False|None)(\s*[,}\]])")
+_JSON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _close_brackets(text: str) -> str:
+    """Close strings, arrays and objects left open by a truncated response."""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    closed = text + ('"' if in_string else "")
+    closed = _TRAILING_COMMA.sub(r"\1", closed.rstrip().rstrip(",") + "".join(reversed(stack)))
+    return closed
+
+
+def loads_lenient(text: str) -> Any:
+    """
+    Parse JSON from an LLM response, repairing common defects.
+
+    Accepts a bare object or one wrapped in prose or a markdown fence, and
+    fixes trailing commas, smart quotes, Python literals and brackets left
+    open by a truncated response. Raises json.JSONDecodeError if it is still
+    not JSON.
+    """
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    if start == -1:
+        return json.loads(text)
+    body = text[start:]
+    try:
+        return json.JSONDecoder().raw_decode(body)[0]
+    except json.JSONDecodeError:
+        pass
+
+    end = max(body.rfind("}"), body.rfind("]"))
+    candidates = [body[:end + 1]] if end != -1 else []
+    candidates.append(body)
+    for candidate in candidates:
+        repaired = _TRAILING_COMMA.sub(r"\1", candidate.translate(_SMART_QUOTES))
+        repaired = _PYTHON_LITERAL.sub(lambda m: m.group(1) + _JSON_LITERALS[m.group(2)] + m.group(3), repaired)
+        for attempt in (repaired, _close_brackets(repaired)):
+            try:
+                return json.loads(attempt)
+            except json.JSONDecodeError:
+                continue
+    return json.loads(body)
+
+
+def parse_structured(text: str, schema: Type["BaseModel"]) -> Dict:
+    """Validate a JSON response against schema, returning it as a plain dict."""
+    from pydantic import ValidationError
+
+    try:
+        return schema.model_validate(loads_lenient(text)).model_dump()
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise StructuredOutputError(str(e)) from e
+
+
+def structured_runnable(llm: "BaseChatModel", schema: Type["BaseModel"]) -> "Runnable":
+    """
+    The model set up to answer with JSON for schema where the provider supports it.
+
+    OpenAI gets JSON mode and Ollama format="json"; Anthropic has no JSON
+    mode, so it is made to call a tool whose arguments follow the schema.
+    Other models are used as they are and rely on the prompt.
+    """
+    llm_type = llm._llm_type
+    if llm_type == "openai-chat":
+        return llm.bind(response_format={"type": "json_object"})
+    if llm_type == "anthropic-chat":
+        return llm.bind_tools([schema], tool_choice=schema.__name__)
+    if llm_type == "chat-ollama":
+        return llm.model_copy(update={"format": "json"})
+    return llm
+
+
+def response_text(message: "BaseMessage") -> str:
+    """JSON text of a structured response (tool call arguments or content)."""
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return json.dumps(tool_calls[0]["args"])
+    if isinstance(message.content, str):
+        return message.content
+    # A tool_use block whose parsed tool call was lost (e.g. a response cached without it)
+    for block in message.content:
+        if isinstance(block, dict) and block.get("type") == "tool_use" and isinstance(block.get("input"), dict):
+            return json.dumps(block["input"])
+    return json.dumps(message.content)
+
+
+def repair_messages(text: str, error: str, schema: Type["BaseModel"]) -> List["BaseMessage"]:
+    """A small request to fix an invalid response, without resending the original prompt."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [
+        SystemMessage(content="""You fix JSON documents so they are valid and match a JSON schema.
+Keep all of the original content; only fix syntax and structure.
+Return ONLY the corrected JSON, no explanations or markdown formatting."""),
+        HumanMessage(content=f"""JSON schema:
+{json.dumps(schema.model_json_schema())}
+
+Error:
+{error[:2000]}
+
+Document to fix:
+{text}"""),
+    ]
@@ -0,0 +1,270 @@
+"""Templates that render boilerplate files without an LLM call, keyed by stack and path."""
+
+import json
+import re
+import string
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+# Render functions get the planned file_info, the build's template context and the
+# files generated so far, and return the content or None to leave the file to the LLM
+RenderFunction = Callable[[Dict, Dict, Mapping[str, str]], Optional[str]]
+
+ANY_STACK = "any"
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9.+#-]*")
+# Stack tags and the tech stack words that imply them
+_STACK_WORDS = {
+    "python": {"python", "fastapi", "django", "flask", "pydantic", "sqlalchemy", "streamlit", "uvicorn"},
+    "node": {
+        "node", "node.js", "nodejs", "express", "express.js", "react", "next", "next.js", "nextjs", "vue",
+        "vue.js", "nuxt", "svelte", "sveltekit", "angular", "vite", "nestjs", "typescript", "javascript", "remix",
+    },
+    "typescript": {"typescript", "nestjs", "angular"},
+    "react": {"react", "next", "next.js", "nextjs", "remix"},
+    "next": {"next", "next.js", "nextjs"},
+}
+
+
+def stacks_for(tech_stack: Dict) -> Set[str]:
+    """
+    Stack tags of a tech stack ("python", "node", "typescript", "react", "next"),
+    plus "any" and every word the stack mentions (so a template can be keyed by e.g. "fastapi").
+    """
+    text = " ".join(str(value) for key, value in (tech_stack or {}).items() if key != "justification").lower()
+    words = {word.rstrip(".") for word in _WORD.findall(text)}
+    return {ANY_STACK, *words, *(tag for tag, tag_words in _STACK_WORDS.items() if words & tag_words)}
+
+
+def _matches(file_path: str, pattern: str) -> bool:
+    """A pattern is a path suffix: a file name, or a file name with the directories above it"""
+    return file_path == pattern or file_path.endswith("/" + pattern)
+
+
+class TemplateLibrary:
+    """
+    Ordered templates, each keyed by a stack tag and a path pattern.
+
+    A template is a fixed string, a string.Template rendered with the build's
+    template context ($project_name, $frontend, $backend, $database,
+    $deployment, $path, $purpose), or a function that may decline by returning
+    None. The first template whose stack applies to the build and whose
+    pattern matches the file renders it; templates registered later, and those
+    loaded from a template directory, take precedence over the built-in ones.
+    """
+
+    def __init__(self):
+        self._templates: List[Tuple[str, str, RenderFunction]] = []
+
+    def register(self, stack: str, pattern: str, template: Union[str, RenderFunction]) -> None:
+        """Add a template for files matching pattern in builds whose stack includes stack."""
+        if isinstance(template, str):
+            template = _string_template(template)
+        self._templates.insert(0, (stack.lower(), pattern, template))
+
+    def load_directory(self, template_dir: Path) -> int:
+        """
+        Register every file under template_dir as a template.
+
+        The first directory level is the stack ("python", "node", "any",
+        "fastapi", ...) and the rest of the path is the pattern, so
+        templates/node/package.json renders every planned package.json of a
+        Node build.
+
+        Returns:
+            Number of templates loaded
+        """
+        loaded = 0
+        for path in sorted(template_dir.rglob("*")):
+            relative = path.relative_to(template_dir)
+            if path.is_file() and len(relative.parts) > 1:
+                self.register(relative.parts[0], PurePosixPath(*relative.parts[1:]).as_posix(), path.read_text(encoding="utf-8"))
+                loaded += 1
+        return loaded
+
+    def can_render(self, file_path: str, stacks: Set[str]) -> bool:
+        """Whether some template may render file_path (it can still decline)."""
+        return any(stack in stacks and _matches(file_path, pattern) for stack, pattern, _ in self._templates)
+
+    def render(self, file_info: Dict, context: Dict, existing_files: Mapping[str, str]) -> Optional[str]:
+        """The content of the first matching template that doesn't decline, or None."""
+        for stack, pattern, render in self._templates:
+            if stack in context["stacks"] and _matches(file_info["path"], pattern):
+                content = render(file_info, context, existing_files)
+                if content is not None:
+                    return content
+        return None
+
+
+def template_context(architecture: Dict, planned_paths: Iterable[str], project_name: str) -> Dict:
+    """What templates are rendered with: the build's stacks, tech stack, planned paths and project name."""
+    tech_stack = architecture.get("tech_stack") or {}
+    return {
+        "stacks": stacks_for(tech_stack),
+        "tech_stack": tech_stack,
+        "paths": list(planned_paths),
+        "project_name": project_name,
+    }
+
+
+def _string_template(text: str) -> RenderFunction:
+    template = string.Template(text)
+
+    def render(file_info: Dict, context: Dict, existing_files: Mapping[str, str]) -> str:
+        tech_stack = context["tech_stack"]
+        return template.safe_substitute(
+            project_name=context["project_name"],
+            path=file_info["path"],
+            purpose=file_info.get("purpose", ""),
+            **{key: str(tech_stack.get(key, "")) for key in ("frontend", "backend", "database", "deployment")},
+        )
+
+    return render
+
+
+# Built-in templates
+
+# An __init__.py whose purpose mentions these has code in it
+_INIT_WITH_CODE = re.compile(r"export|expose|import|factory|register|create_app|instance|blueprint|router", re.IGNORECASE)
+
+
+def _init_py(file_info: Dict, context: Dict, existing_files: Mapping[str, str]) -> Optional[str]:
+    return None if _INIT_WITH_CODE.search(file_info.get("purpose", "")) else ""
+
+
+_GITIGNORE = {
+    "python": """# Python
+__pycache__/
+*.py[cod]
+*.egg-info/
+.eggs/
+build/
+dist/
+.venv/
+venv/
+.pytest_cache/
+.mypy_cache/
+.ruff_cache/
+.coverage
+htmlcov/
+""",
+    "node": """# Node
+node_modules/
+dist/
+build/
+.next/
+out/
+coverage/
+npm-debug.log*
+yarn-debug.log*
+yarn-error.log*
+pnpm-debug.log*
+""",
+}
+_GITIGNORE_COMMON = """# Environment
+.env
+.env.local
+
+# Editors and OS
+.idea/
+.vscode/
+.DS_Store
+*.log
+"""
+
+_DOCKERIGNORE = {
+    "python": "__pycache__/\n*.py[cod]\n.venv/\nvenv/\n.pytest_cache/\n.mypy_cache/\n",
+    "node": "node_modules/\nnpm-debug.log*\n.next/\ncoverage/\n",
+}
+_DOCKERIGNORE_COMMON = ".git/\n.gitignore\n.env\n.env.local\nDockerfile\n.dockerignore\n*.md\n"
+
+
+def _by_stack(sections: Dict[str, str], common: str) -> RenderFunction:
+    """Content assembled from the sections of the build's stacks, or declined for unknown stacks"""
+    def render(file_info: Dict, context: Dict, existing_files: Mapping[str, str]) -> Optional[str]:
+        parts = [section for stack, section in sections.items() if stack in context["stacks"]]
+        return "\n".join([*parts, common]) if parts else None
+
+    return render
+
+
+def _tsconfig(file_info: Dict, context: Dict, existing_files: Mapping[str, str]) -> Optional[str]:
+    # Next.js writes its own tsconfig on first run; let the LLM follow its conventions
+    if "next" in context["stacks"]:
+        return None
+    directory = PurePosixPath(file_info["path"]).parent.as_posix()
+    prefix = "" if directory == "." else directory + "/"
+    siblings = [path[len(prefix):] for path in context["paths"] if path.startswith(prefix)]
+    include = ["src"] if any(path.startswith("src/") for path in siblings) else ["**/*.ts", "**/*.tsx"]
+    if any(path.endswith(".tsx") for path in siblings):
+        options = {
+            "target": "ES2020",
+            "lib": ["DOM", "DOM.Iterable", "ES2020"],
+            "module": "ESNext",
+            "moduleResolution": "bundler",
+            "jsx": "react-jsx",
+            "strict": True,
+            "skipLibCheck": True,
+            "esModuleInterop": True,
+            "resolveJsonModule": True,
+            "isolatedModules": True,
+            "noEmit": True,
+        }
+    else:
+        options = {
+            "target": "ES2022",
+            "module": "commonjs",
+            "outDir": "dist",
+            "strict": True,
+            "skipLibCheck": True,
+            "esModuleInterop": True,
+            "resolveJsonModule": True,
+            "forceConsistentCasingInFileNames": True,
+        }
+        if include == ["src"]:
+            options["rootDir"] = "src"
+    return json.dumps({"compilerOptions": options, "include": include}, indent=2) + "\n"
+
+
+_ENV_REFERENCE = re.compile(
+    r"""os\.(?:getenv|environ\.get)\(\s*["']([A-Z][A-Z0-9_]*)["']\s*(?:,\s*["']([^"'\n]*)["'])?"""
+    r"""|os\.environ\[\s*["']([A-Z][A-Z0-9_]*)["']\s*\]"""
+    r"""|process\.env\.([A-Z][A-Z0-9_]*)"""
+    r"""|import\.meta\.env\.([A-Z][A-Z0-9_]*)"""
+)
+
+
+def _env_example(file_info: Dict, context: Dict, existing_files: Mapping[str, str]) -> Optional[str]:
+    """The environment variables its dependencies read, with their defaults; declined if they read none"""
+    variables: Dict[str, str] = {}
+    for dependency in file_info.get("dependencies", []):
+        if dependency not in existing_files:
+            continue
+        for match in _ENV_REFERENCE.finditer(existing_files[dependency]):
+            name = match.group(1) or match.group(3) or match.group(4) or match.group(5)
+            if name not in variables or not variables[name]:
+                variables[name] = match.group(2) or ""
+    if not variables:
+        return None
+    return "".join(f"{name}={default}\n" for name, default in variables.items())
+
+
+def default_library() -> TemplateLibrary:
+    """The built-in templates: package markers, ignore files, editor config, tsconfig and env examples."""
+    library = TemplateLibrary()
+    library.register("python", "__init__.py", _init_py)
+    library.register("python", "py.typed", "")
+    library.register(ANY_STACK, ".gitignore", _by_stack(_GITIGNORE, _GITIGNORE_COMMON))
+    library.register(ANY_STACK, ".dockerignore", _by_stack(_DOCKERIGNORE, _DOCKERIGNORE_COMMON))
+    library.register(ANY_STACK, ".gitattributes", "* text=auto eol=lf\n")
+    library.register(
+        ANY_STACK, ".editorconfig",
+        "root = true\n\n[*]\ncharset = utf-8\nend_of_line = lf\ninsert_final_newline = true\n"
+        "trim_trailing_whitespace = true\nindent_style = space\nindent_size = 2\n\n[*.py]\nindent_size = 4\n\n"
+        "[Makefile]\nindent_style = tab\n",
+    )
+    library.register("typescript", "tsconfig.json", _tsconfig)
+    library.register("react", "tsconfig.json", _tsconfig)
+    for name in (".env.example", ".env.sample", ".env.template", "env.example"):
+        library.register(ANY_STACK, name, _env_example)
+    return library
@@ -0,0 +1,284 @@
+"""Critical path and per-phase latency of a build, read from its trace.jsonl."""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from tracing import TRACE_FILENAME
+
+# Spans that generate files; the critical path through a step follows their dependencies
+_FILE_KINDS = ("file", "batch")
+
+
+def load_trace(path: Path) -> List[Dict]:
+    """
+    Read the spans of a trace.jsonl (or of the trace.jsonl in a build's output directory).
+
+    A line cut short by an interrupted build is skipped.
+    """
+    if path.is_dir():
+        path = path / TRACE_FILENAME
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def _end(span: Dict) -> float:
+    return span["start"] + span.get("duration", 0.0)
+
+
+def _root_span(spans: List[Dict]) -> Dict:
+    """The build span, or a stand-in covering every span when the build didn't finish"""
+    for span in spans:
+        if span["kind"] == "build":
+            return span
+    start = min(span["start"] for span in spans)
+    ids = {span["id"] for span in spans}
+    # The build span is the one parent never written
+    orphaned = [span["parent"] for span in spans if span["parent"] is not None and span["parent"] not in ids]
+    return {
+        "id": min(orphaned, default=None),
+        "name": "build", "kind": "build", "start": start,
+        "duration": max(_end(span) for span in spans) - start, "interrupted": True,
+    }
+
+
+class _Trace:
+    def __init__(self, spans: List[Dict]):
+        self.spans = spans
+        self.root = _root_span(spans)
+        self.children: Dict[Optional[int], List[Dict]] = defaultdict(list)
+        for span in spans:
+            self.children[span["parent"]].append(span)
+        for siblings in self.children.values():
+            siblings.sort(key=lambda span: span["start"])
+
+    def descendants(self, span: Dict, kind: str) -> List[Dict]:
+        found = []
+        stack = list(self.children[span["id"]])
+        while stack:
+            child = stack.pop()
+            if child["kind"] == kind:
+                found.append(child)
+            stack.extend(self.children[child["id"]])
+        return found
+
+    def llm_seconds(self, span: Dict) -> float:
+        return sum(llm.get("duration", 0.0) for llm in self.descendants(span, "llm"))
+
+    def tokens(self, span: Dict) -> Dict[str, int]:
+        llms = [span] if span["kind"] == "llm" else self.descendants(span, "llm")
+        return {
+            key: sum(llm.get(key, 0) for llm in llms)
+            for key in ("input_tokens", "cached_tokens", "output_tokens")
+        }
+
+
+def _file_chain(trace: _Trace, step: Dict) -> List[Dict]:
+    """
+    The chain of file spans that decided when a step finished.
+
+    Starts from the file that finished last and walks back through the
+    dependency that finished last before it started. A file whose
+    dependencies don't explain its start waited for a free worker instead.
+    """
+    files = [span for span in trace.children[step["id"]] if span["kind"] in _FILE_KINDS]
+    if not files:
+        return []
+    by_path = {}
+    for span in files:
+        for path in span.get("files") or [span["name"]]:
+            by_path[path] = span
+    chain = [max(files, key=_end)]
+    while True:
+        current = chain[-1]
+        before = [
+            by_path[dep] for dep in current.get("dependencies", [])
+            if dep in by_path and by_path[dep] is not current and _end(by_path[dep]) <= current["start"] + 1e-3
+        ]
+        if not before:
+            break
+        chain.append(max(before, key=_end))
+    return chain[::-1]
+
+
+def critical_path(trace: _Trace) -> List[Dict]:
+    """
+    Build steps in order, with each file-generating step expanded into its file chain.
+
+    Returns:
+        Entries {"name", "kind", "step", "offset", "duration", "wait", "llm",
+        "retries", "error"}: offset is seconds from the build start, wait the
+        idle time since the previous entry ended
+    """
+    build_start = trace.root["start"]
+    entries = []
+    previous_end = build_start
+
+    def add(span: Dict, step: Dict) -> None:
+        nonlocal previous_end
+        entries.append({
+            "name": span["name"],
+            "kind": span["kind"],
+            "step": step["name"],
+            "offset": round(span["start"] - build_start, 3),
+            "duration": round(span.get("duration", 0.0), 3),
+            "wait": round(max(0.0, span["start"] - previous_end), 3),
+            "llm": round(trace.llm_seconds(span), 3),
+            # A streamed file is retried whole, so its retries are counted on the file span
+            "retries": span.get("retries", 0) + sum(llm.get("retries", 0) for llm in trace.descendants(span, "llm")),
+            "error": span.get("error"),
+        })
+        previous_end = _end(span)
+
+    for step in trace.children[trace.root["id"]]:
+        chain = _file_chain(trace, step)
+        if not chain:
+            add(step, step)
+            continue
+        previous_end = max(previous_end, step["start"])
+        for span in chain:
+            add(span, step)
+        previous_end = _end(step)
+    return entries
+
+
+def phase_latency(trace: _Trace) -> List[Dict]:
+    """Per implementation phase: files, wall time, summed file time, LLM time, tokens and the slowest file"""
+    phases: Dict[int, List[Dict]] = defaultdict(list)
+    for span in trace.spans:
+        if span["kind"] in _FILE_KINDS:
+            phases[span.get("phase", 0)].append(span)
+    rows = []
+    for phase, spans in sorted(phases.items()):
+        slowest = max(spans, key=lambda span: span.get("duration", 0.0))
+        tokens = defaultdict(int)
+        for span in spans:
+            for key, value in trace.tokens(span).items():
+                tokens[key] += value
+        rows.append({
+            "phase": phase,
+            "files": sum(len(span.get("files") or [span["name"]]) for span in spans),
+            "wall": round(max(map(_end, spans)) - min(span["start"] for span in spans), 3),
+            "busy": round(sum(span.get("duration", 0.0) for span in spans), 3),
+            "llm": round(sum(trace.llm_seconds(span) for span in spans), 3),
+            **tokens,
+            "slowest": slowest["name"],
+            "slowest_duration": round(slowest.get("duration", 0.0), 3),
+        })
+    return rows
+
+
+def slowest_llm_calls(trace: _Trace, top: int) -> List[Dict]:
+    by_id = {span["id"]: span for span in trace.spans}
+    calls = sorted(
+        (span for span in trace.spans if span["kind"] == "llm"), key=lambda span: -span.get("duration", 0.0)
+    )
+    return [
+        {
+            "for": by_id[call["parent"]]["name"] if call["parent"] in by_id else "?",
+            "model": call.get("model"),
+            "duration": round(call.get("duration", 0.0), 3),
+            "first_token": round(call["first_token"] - call["start"], 3) if "first_token" in call else None,
+            "retries": call.get("retries", 0),
+            **trace.tokens(call),
+        }
+        for call in calls[:top]
+    ]
+
+
+def report(spans: List[Dict], top: int = 5) -> Dict:
+    """Everything trace_report prints, as a dict"""
+    trace = _Trace(spans)
+    by_kind = defaultdict(float)
+    for span in spans:
+        if span["kind"] != "build":
+            by_kind[span["kind"]] += span.get("duration", 0.0)
+    return {
+        "build": {
+            key: value for key, value in trace.root.items() if key not in ("id", "parent", "name", "kind", "start")
+        },
+        "steps": [
+            {"name": step["name"], "duration": round(step.get("duration", 0.0), 3), "llm": round(trace.llm_seconds(step), 3)}
+            for step in trace.children[trace.root["id"]]
+        ],
+        "critical_path": critical_path(trace),
+        "phases": phase_latency(trace),
+        "seconds_by_kind": {kind: round(seconds, 3) for kind, seconds in sorted(by_kind.items())},
+        "slowest_llm_calls": slowest_llm_calls(trace, top),
+    }
+
+
+def print_report(result: Dict) -> None:
+    build = result["build"]
+    status = " (interrupted)" if build.get("interrupted") else ""
+    print(f"{'='*60}")
+    print(f"⏱️  Build{status}: {build['duration']:.2f}s"
+          + (f" with {build['provider']} {build['model']}" if "model" in build else "")
+          + (f", {build['files']}/{build['planned_files']} files" if "files" in build else ""))
+    print(f"{'='*60}")
+
+    print("\nSteps:")
+    for step in result["steps"]:
+        print(f"   {step['name']:<14} {step['duration']:>8.2f}s   LLM {step['llm']:>8.2f}s")
+
+    path = result["critical_path"]
+    print(f"\nCritical path ({len(path)} spans):")
+    for entry in path:
+        name = entry["name"] if entry["kind"] == "step" else f"{entry['name']} ({entry['step']})"
+        wait = f"  (waited {entry['wait']:.2f}s)" if entry["wait"] >= 0.01 else ""
+        retries = f", {entry['retries']} retries" if entry["retries"] else ""
+        failed = " ❌" if entry["error"] else ""
+        print(f"   {'+%.2fs' % entry['offset']:>9}  {entry['duration']:>7.2f}s  {entry['kind']:<6} {name}"
+              f"  [LLM {entry['llm']:.2f}s{retries}]{wait}{failed}")
+
+    print("\nPer phase:")
+    print(f"   {'phase':>5} {'files':>5} {'wall':>8} {'busy':>8} {'LLM':>8} {'tokens in/out':>15}  slowest file")
+    for row in result["phases"]:
+        tokens = f"{row['input_tokens']:,}/{row['output_tokens']:,}"
+        print(f"   {row['phase']:>5} {row['files']:>5} {row['wall']:>7.2f}s {row['busy']:>7.2f}s {row['llm']:>7.2f}s"
+              f" {tokens:>15}  {row['slowest']} ({row['slowest_duration']:.2f}s)")
+
+    print("\nTime by span kind (summed over parallel work):")
+    for kind, seconds in result["seconds_by_kind"].items():
+        print(f"   {kind:<6} {seconds:>8.2f}s")
+
+    print("\nSlowest LLM calls:")
+    for call in result["slowest_llm_calls"]:
+        first_token = f", first token {call['first_token']:.2f}s" if call["first_token"] is not None else ""
+        retries = f", {call['retries']} retries" if call["retries"] else ""
+        print(f"   {call['duration']:>7.2f}s  {call['for']} ({call['model']}{first_token}{retries}, "
+              f"{call['input_tokens']:,} in / {call['output_tokens']:,} out)")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Show the critical path and per-phase latency of a build.")
+    parser.add_argument("trace", type=Path, help=f"Build output directory or its {TRACE_FILENAME}")
+    parser.add_argument("--top", type=int, default=5, help="Slowest LLM calls to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        spans = load_trace(args.trace)
+    except OSError as e:
+        sys.exit(f"❌ Could not read the trace: {e}")
+    if not spans:
+        sys.exit("❌ The trace is empty")
+
+    result = report(spans, args.top)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,119 @@
+"""Lightweight tracing of a build's steps, files and LLM calls, exported as trace.jsonl."""
+
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+TRACE_FILENAME = "trace.jsonl"
+
+# The tracer of the running build and the innermost open span
+_tracer: ContextVar[Optional["BuildTracer"]] = ContextVar("tracer", default=None)
+_current_span: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_span", default=None)
+
+
+class BuildTracer:
+    """
+    Records spans of one build, one JSON object per line in trace.jsonl.
+
+    A span has an id, its parent's id, a name, a kind ("build", "step", "file",
+    "batch", "llm", "write"), its start (epoch seconds) and duration, plus
+    attributes such as phase, file path, model, token counts, retries and bytes
+    written. Spans are written when they end, so the file is complete up to
+    the last finished span even if the build is interrupted.
+    """
+
+    def __init__(self, path: Path, **attributes: Any):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._root = self._new_span("build", "build", None, attributes)
+        self._root_started = time.perf_counter()
+        self._token = None
+
+    def _new_span(self, name: str, kind: str, parent: Optional[Dict], attributes: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": next(self._ids),
+            "parent": parent["id"] if parent is not None else None,
+            "name": name,
+            "kind": kind,
+            "start": time.time(),
+            **attributes,
+        }
+
+    def _write(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def activate(self) -> None:
+        """Make this the tracer of spans opened in the current context (and tasks/threads started from it)."""
+        previous = _tracer.get()
+        if previous is not None and previous is not self:
+            # Left active by a build that raised before finishing
+            previous.close()
+        self._token = (_tracer.set(self), _current_span.set(self._root))
+
+    def close(self) -> None:
+        """Close trace.jsonl without ending the build span (the trace then reads as interrupted)."""
+        with self._lock:
+            self._file.close()
+
+    def finish(self, **attributes: Any) -> None:
+        """End the build span, close trace.jsonl and deactivate the tracer."""
+        self._root.update(attributes, duration=time.perf_counter() - self._root_started)
+        self._write(self._root)
+        self.close()
+        if self._token is not None:
+            tracer_token, span_token = self._token
+            _current_span.reset(span_token)
+            _tracer.reset(tracer_token)
+            self._token = None
+
+
+@contextmanager
+def trace_span(name: str, kind: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Record the block as a span of the active build, nested under the innermost open span.
+
+    Yields the span's attributes so the block can add to them (tokens, bytes,
+    ...). Without an active tracer this does nothing.
+    """
+    tracer = _tracer.get()
+    if tracer is None or tracer._file.closed:
+        yield dict(attributes)
+        return
+    span = tracer._new_span(name, kind, _current_span.get(), attributes)
+    token = _current_span.set(span)
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span["duration"] = time.perf_counter() - started
+        _current_span.reset(token)
+        tracer._write(span)
+
+
+def annotate_span(**attributes: Any) -> None:
+    """Add attributes to the innermost open span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.update(attributes)
+
+
+def count_retry(error: BaseException, delay: float) -> None:
+    """on_retry hook for call_with_retry: count retries on the innermost open span."""
+    span = _current_span.get()
+    if span is not None:
+        span["retries"] = span.get("retries", 0) + 1
+        span["retry_wait"] = span.get("retry_wait", 0.0) + delay
@@ -1,9 +1,13 @@
 import os
+import json
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from pathlib import Path
 from dotenv import load_dotenv
 import zipfile
 import io
+import threading
+import time
 
 # Import builder functions
 from main import (
@@ -12,7 +16,8 @@ from main import (
     generate_tech_stack_and_architecture,
     generate_implementation_plan,
     AVAILABLE_MODELS,
-    create_llm,
+    get_llm,
+    get_response_cache,
     get_model_pricing,
     format_pricing_info,
 )
@@ -88,6 +93,9 @@ if "step" not in st.session_state:
     st.session_state.build_complete = False
     st.session_state.provider = "openai"
     st.session_state.model = "gpt-4o"
+    st.session_state.use_cache = True
+    st.session_state.max_cost = 0.0
+    st.session_state.route_models = False
 
 
 def reset_session():
@@ -103,6 +111,9 @@ def reset_session():
     st.session_state.build_complete = False
     st.session_state.provider = "openai"
     st.session_state.model = "gpt-4o"
+    st.session_state.use_cache = True
+    st.session_state.max_cost = 0.0
+    st.session_state.route_models = False
 
 
 def create_zip(output_dir: str) -> bytes:
@@ -120,6 +131,27 @@ def create_zip(output_dir: str) -> bytes:
     return zip_buffer.read()
 
 
+def show_streamed_code(placeholder):
+    """Build callback that shows the tail of the file being generated, refreshed a few times a second"""
+    ctx = get_script_run_ctx()
+    tails = {}
+    last_update = [0.0]
+    lock = threading.Lock()
+    
+    def show_chunk(file_path: str, text: str):
+        # Chunks arrive on the builder's worker threads
+        add_script_run_ctx(threading.current_thread(), ctx)
+        with lock:
+            tails[file_path] = (tails.get(file_path, "") + text)[-1500:]
+            now = time.monotonic()
+            if now - last_update[0] < 0.25:
+                return
+            last_update[0] = now
+            placeholder.code(f"✍️ {file_path}\n\n{tails[file_path]}", language=None)
+    
+    return show_chunk
+
+
 def main():
     # Header
     st.markdown('<div class="main-header">🔨 MVP Builder Agent</div>', unsafe_allow_html=True)
@@ -260,6 +292,26 @@ def main():
         )
         st.session_state.output_dir = output_dir
         
+        st.session_state.use_cache = st.checkbox(
+            "Reuse cached LLM responses",
+            value=st.session_state.use_cache,
+            help="Unchanged calls are served from the on-disk response cache instead of the provider"
+        )
+        
+        st.session_state.max_cost = st.number_input(
+            "Max spend per build ($, 0 = no limit):",
+            min_value=0.0,
+            value=st.session_state.max_cost,
+            step=0.5,
+            help="No new files are started once the build has spent this much"
+        )
+        
+        st.session_state.route_models = st.checkbox(
+            "Use cheaper models for routine files",
+            value=st.session_state.route_models,
+            help="Boilerplate, config, docs and README go to a fast model; complex files keep the selected model"
+        )
+        
         if st.button("🚀 Start Building", type="primary", use_container_width=True):
             if st.session_state.builder_prompt.strip():
                 st.session_state.step = "architecture"
@@ -273,7 +325,11 @@ def main():
         
         with st.spinner("Analyzing builder prompt and generating tech stack..."):
             try:
-                llm_instance = create_llm(st.session_state.provider, st.session_state.model)
+                llm_instance = get_llm(
+                    st.session_state.provider,
+                    st.session_state.model,
+                    cache=get_response_cache() if st.session_state.use_cache else None,
+                )
                 st.session_state.architecture = generate_tech_stack_and_architecture(
                     st.session_state.builder_prompt,
                     llm_instance
@@ -297,7 +353,11 @@ def main():
         
         with st.spinner("Creating detailed implementation plan..."):
             try:
-                llm_instance = create_llm(st.session_state.provider, st.session_state.model)
+                llm_instance = get_llm(
+                    st.session_state.provider,
+                    st.session_state.model,
+                    cache=get_response_cache() if st.session_state.use_cache else None,
+                )
                 phases = generate_implementation_plan(
                     st.session_state.builder_prompt,
                     st.session_state.architecture,
@@ -328,15 +388,22 @@ def main():
         
         st.markdown("---")
         st.markdown("### 🔨 Step 3: Building Prototype")
-        st.info("This may take several minutes. The agent is generating code files step by step...")
+        st.info("This may take several minutes. The agent generates code files from the architecture and plan shown above...")
         
         if st.button("🚀 Start Building Files", type="primary", use_container_width=True):
+            live_code = st.empty()
             try:
                 output_path = build_prototype(
                     st.session_state.builder_prompt,
                     st.session_state.output_dir,
                     provider=st.session_state.provider,
                     model=st.session_state.model,
+                    use_cache=st.session_state.use_cache,
+                    architecture=st.session_state.architecture,
+                    phases=st.session_state.implementation_plan["phases"],
+                    on_chunk=show_streamed_code(live_code),
+                    max_cost=st.session_state.max_cost or None,
+                    route_models=st.session_state.route_models,
                 )
                 st.session_state.build_complete = True
                 st.session_state.output_path = str(output_path)
@@ -360,6 +427,21 @@ def main():
             file_count = len([f for f in files if f.is_file()])
             st.info(f"Total files created: {file_count}")
             
+            ledger_path = output_path / "ledger.json"
+            if ledger_path.exists():
+                totals = json.loads(ledger_path.read_text(encoding="utf-8"))["totals"]
+                col_cost, col_calls, col_in, col_out = st.columns(4)
+                col_cost.metric("💰 LLM Cost", f"${totals['cost']:.4f}")
+                col_calls.metric("LLM Calls", totals["calls"])
+                col_in.metric("Input Tokens", f"{totals['input_tokens']:,}", help=f"{totals['cached_input_tokens']:,} served from prompt cache ({totals.get('cache_hit_rate', 0):.0%})")
+                col_out.metric("Output Tokens", f"{totals['output_tokens']:,}")
+                if totals.get("by_tier"):
+                    st.table([
+                        {"Tier": tier, "Models": ", ".join(map(str, tier_totals["models"])),
+                         "Calls": tier_totals["calls"], "Cost ($)": f"{tier_totals['cost']:.4f}"}
+                        for tier, tier_totals in totals["by_tier"].items()
+                    ])
+            
             with st.expander("View File Tree"):
                 for file_path in sorted(files):
                     if file_path.is_file():
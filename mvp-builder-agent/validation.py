@@ -0,0 +1,224 @@
+"""Local syntax checks of generated files, run in parallel after a build."""
+
+import json
+import os
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+_JS_SUFFIXES = {".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts"}
+# JSON files that conventionally allow comments and trailing commas
+_JSONC_PREFIXES = ("tsconfig", "jsconfig", ".eslintrc", "devcontainer")
+# A "/" after one of these starts a regex literal rather than a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{;+-*%~^") | {""}
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "void", "yield", "await"}
+_CLOSERS = {")": "(", "]": "[", "}": "{"}
+
+# Below this many files a process pool costs more than it saves
+_INLINE_LIMIT = 16
+
+
+def _check_python(content: str, file_path: str) -> Optional[str]:
+    try:
+        # compile (unlike ast.parse) also rejects e.g. return outside a function
+        compile(content, file_path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return f"line {e.lineno}: {e.msg}"
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _check_json(content: str, file_path: str) -> Optional[str]:
+    if PurePosixPath(file_path).name.startswith(_JSONC_PREFIXES):
+        return None
+    try:
+        json.loads(content)
+    except json.JSONDecodeError as e:
+        return f"line {e.lineno}: {e.msg}"
+    return None
+
+
+def _check_toml(content: str, file_path: str) -> Optional[str]:
+    try:
+        tomllib.loads(content)
+    except tomllib.TOMLDecodeError as e:
+        return str(e)
+    return None
+
+
+def _check_yaml(content: str, file_path: str) -> Optional[str]:
+    try:
+        import yaml
+    except ImportError:
+        return None
+    try:
+        for _ in yaml.safe_load_all(content):
+            pass
+    except yaml.YAMLError as e:
+        return str(e).replace("\n", " ")
+    return None
+
+
+def _previous_word(code: str, end: int) -> str:
+    while end > 0 and code[end - 1] in " \t":
+        end -= 1
+    start = end
+    while start > 0 and (code[start - 1].isalnum() or code[start - 1] in "_$"):
+        start -= 1
+    return code[start:end]
+
+
+def _check_js(content: str, file_path: str) -> Optional[str]:
+    """
+    Bracket balance of JS/TS outside comments, strings, template literals and regexes.
+
+    Deliberately lenient where JSX makes plain tokenizing ambiguous: a quote
+    left open at the end of a line (an apostrophe in JSX text) or a regex that
+    runs to the end of a line is not reported.
+    """
+    stack = []  # (bracket, line); "${" marks an expression inside a template literal
+    line = 1
+    index = 0
+    length = len(content)
+    last = ""  # last significant character outside comments and strings
+    while index < length:
+        char = content[index]
+        if char == "\n":
+            line += 1
+        elif content.startswith("//", index):
+            index = content.find("\n", index)
+            if index == -1:
+                break
+            continue
+        elif content.startswith("/*", index):
+            end = content.find("*/", index + 2)
+            if end == -1:
+                return f"line {line}: unterminated comment"
+            line += content.count("\n", index, end)
+            index = end + 2
+            continue
+        elif char in "'\"":
+            index += 1
+            while index < length and content[index] not in (char, "\n"):
+                index += 2 if content[index] == "\\" else 1
+            last = char
+            if index < length and content[index] == "\n":
+                continue
+        elif char == "`" or (char == "}" and stack and stack[-1][0] == "${"):
+            if char == "}":
+                stack.pop()
+            template_line = line
+            index += 1
+            while index < length and content[index] != "`" and not content.startswith("${", index):
+                if content[index] == "\n":
+                    line += 1
+                index += 2 if content[index] == "\\" else 1
+            if index >= length:
+                return f"line {template_line}: unterminated template literal"
+            if content[index] == "$":
+                stack.append(("${", line))
+                index += 2
+                last = "{"
+                continue
+            last = "`"
+        elif char == "/" and (last in _REGEX_PRECEDERS or _previous_word(content, index) in _REGEX_KEYWORDS):
+            index += 1
+            in_class = False
+            while index < length and content[index] != "\n":
+                current = content[index]
+                if current == "\\":
+                    index += 1
+                elif current == "[":
+                    in_class = True
+                elif current == "]":
+                    in_class = False
+                elif current == "/" and not in_class:
+                    index += 1
+                    break
+                index += 1
+            last = "/"
+            continue
+        elif char in "([{":
+            stack.append((char, line))
+            last = char
+        elif char in ")]}":
+            if not stack or stack[-1][0] != _CLOSERS[char]:
+                opened = f" ('{stack[-1][0]}' from line {stack[-1][1]} is still open)" if stack else ""
+                return f"line {line}: unexpected '{char}'{opened}"
+            stack.pop()
+            last = char
+        elif not char.isspace():
+            last = char
+        index += 1
+
+    if stack:
+        bracket, opened_line = stack[-1]
+        return f"line {opened_line}: '{bracket}' is never closed"
+    return None
+
+
+_CHECKS = {
+    ".py": _check_python,
+    ".json": _check_json,
+    ".toml": _check_toml,
+    ".yaml": _check_yaml,
+    ".yml": _check_yaml,
+    **{suffix: _check_js for suffix in _JS_SUFFIXES},
+}
+
+
+def can_validate(file_path: str) -> bool:
+    return PurePosixPath(file_path).suffix.lower() in _CHECKS
+
+
+def validate_file(file_path: str, content: str) -> Optional[str]:
+    """
+    Check that a file parses, using only local parsers.
+
+    Returns:
+        The error (with its line number where known), or None if the file is
+        valid or of a type that isn't checked
+    """
+    check = _CHECKS.get(PurePosixPath(file_path).suffix.lower())
+    return check(content, file_path) if check is not None else None
+
+
+def _validate_path(root: str, file_path: str) -> Optional[str]:
+    try:
+        content = (Path(root) / file_path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        return str(e)
+    return validate_file(file_path, content)
+
+
+def validate_files(root: Path, file_paths: List[str], max_workers: Optional[int] = None) -> Dict[str, str]:
+    """
+    Validate files under root in parallel in a process pool (inline for a handful of files).
+
+    Each worker reads the files it checks, so contents never pass through
+    (or pile up in) the calling process.
+
+    Args:
+        root: Directory the paths are relative to
+        file_paths: Files to check
+        max_workers: Processes to use (default: one per CPU)
+
+    Returns:
+        {file_path: error} for the files that failed, in the order given
+    """
+    paths = [path for path in file_paths if can_validate(path)]
+    roots = [str(root)] * len(paths)
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1 or len(paths) <= _INLINE_LIMIT:
+        errors = list(map(_validate_path, roots, paths))
+    else:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(paths) // (workers * 4))
+                errors = list(executor.map(_validate_path, roots, paths, chunksize=chunksize))
+        except (OSError, RuntimeError):
+            # No process pool available here (e.g. a restricted sandbox)
+            errors = list(map(_validate_path, roots, paths))
+    return {path: error for path, error in zip(paths, errors) if error is not None}